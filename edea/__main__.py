@@ -32,6 +32,9 @@ parser.add_argument('--output', type=str, nargs='?', default=False,
                     help="Specify output directory for merge, or output file for metadata extraction.")
 parser.add_argument('projects', type=str, nargs='+',
                     help='Path(s) to the KiCad Project directory used as input.')
+parser.add_argument('--cache-dir', type=str, default=None,
+                    help='Directory to cache parsed files in, speeds up repeated metadata extraction of unchanged '
+                         'projects.')
 parser.add_argument('-adir', type=str, nargs='?', default=None, help='Visual diff input directory A')
 parser.add_argument('-bdir', type=str, nargs='?', default=None, help='Visual diff input directory B')
 parser.add_argument('-odir', type=str, nargs='?', default=None, help='Visual diff output directory')
@@ -64,7 +67,7 @@ if args.extract_meta:
         log.error("No KiCad project directory or project file provided")
         sys.exit(22)  # invalid argument
 
-    pro = Project(root_schematic, root_pcb)
+    pro = Project(root_schematic, root_pcb, args.cache_dir)
     before = time()
     pro.parse()
     after = time()
@@ -142,7 +145,7 @@ elif args.merge:
 
     # write the resulting schematic
     with open(f"{os.path.join(output_path, output_name)}.kicad_sch", "w", encoding="utf-8") as f:
-        f.write(str(target_schematic.as_expr()))
+        target_schematic.as_expr().write(f)
 
     # copy over all the schematics from the modules
     for project_path, obj in files.items():
@@ -39,8 +39,8 @@ class BoundingBox:
     def envelop(self, points):
         """
         Envelop the existing bounding box with new points
-        This might need optimization, we're doing some unnecessary
-        math for the sake of programmatic simplicity
+        Only the new points are reduced, the result is merged with the
+        current extent instead of concatenating the box corners to them.
         """
         if points is None or len(points) == 0:
             return
@@ -48,13 +48,15 @@ class BoundingBox:
             raise ValueError(
                 f"Points must be a (n,2), array but it has shape {points.shape}"
             )
+        lower = np.min(points, axis=0)
+        upper = np.max(points, axis=0)
         if self._valid:
-            extended = np.concatenate((points, self.corners))
-        else:
-            extended = points
+            # merging with the float64 extent promotes integer points like the corners used to
+            lower = np.minimum(lower, np.array((self.min_x, self.min_y), dtype=np.float64))
+            upper = np.maximum(upper, np.array((self.max_x, self.max_y), dtype=np.float64))
         self._valid = True
-        self.min_x, self.min_y = np.min(extended, axis=0)
-        self.max_x, self.max_y = np.max(extended, axis=0)
+        self.min_x, self.min_y = lower
+        self.max_x, self.max_y = upper
 
     def translate(self, coords):
         """
@@ -79,13 +81,12 @@ class BoundingBox:
         """
         if self._valid:
             corners = self.corners
-            rotated = np.zeros((4, 2), dtype=np.float64)
             angle = angle / tau
             angle_sin, angle_cos = sin(angle), cos(angle)
-            for i, corner in enumerate(corners):
-                x_out = corner[0] * angle_cos + corner[1] * angle_sin
-                y_out = corner[1] * angle_cos + corner[0] * angle_sin
-                rotated[i] = [x_out, y_out]
+            # all four corners at once, with the same arithmetic as rot()
+            rotated = np.empty((4, 2), dtype=np.float64)
+            rotated[:, 0] = corners[:, 0] * angle_cos + corners[:, 1] * angle_sin
+            rotated[:, 1] = corners[:, 1] * angle_cos + corners[:, 0] * angle_sin
             self.reset()
             self.envelop(rotated)
 
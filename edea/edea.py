@@ -8,12 +8,14 @@ SPDX-License-Identifier: EUPL-1.2
 """
 from __future__ import annotations
 
+import hashlib
 import os
-from itertools import filterfalse, groupby
+import pickle  # nosec B403 - only used for the opt-in cache of our own parsed files, see Project
+from concurrent.futures import ThreadPoolExecutor
 from operator import methodcaller
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Tuple
 from uuid import uuid4
-from copy import deepcopy
+from copy import copy, deepcopy
 
 import numpy as np
 
@@ -25,6 +27,15 @@ from .parser import (Drawable, Expr, Footprint, FPLine, Movable, Polygon,
 copy_parts = ["footprint", "zone", "via", "segment", "arc", "gr_text", "gr_line", "gr_poly", "gr_arc", "gr_circle",
               "gr_curve", "dimension"]
 
+# bump this when the pickled Expr classes change so that old cache entries are ignored
+CACHE_FORMAT = 2
+
+# constant parts of generated sheets, each use gets its own clone
+sheet_stroke = from_str("(stroke (width 0) (type solid) (color 0 0 0 0))")
+sheet_fill = from_str("(fill (color 0 0 0 0.0000))")
+sheet_property_effects = from_str("(effects (font (size 1.27 1.27)) (justify left bottom))")
+sheet_pin_effects = from_str("(effects (font (size 1.27 1.27)) (justify right))")
+
 
 class VersionError(Exception):
     """ VersionError
@@ -32,6 +43,19 @@ class VersionError(Exception):
     """
 
 
+class MissingUUIDError(AttributeError):
+    """ MissingUUIDError
+    Schematic doesn't have a uuid, e.g. minimal files written by hand or by old versions of other tools
+    """
+
+
+def _schematic_uuid(sch: Expr, file_name: str) -> str:
+    try:
+        return sch.uuid[0]
+    except AttributeError as e:
+        raise MissingUUIDError(f"{file_name} does not contain a uuid") from e
+
+
 class Schematic:
     """ Schematic
     Representation of a kicad schematic
@@ -71,19 +95,19 @@ class Schematic:
         box = BoundingBox(np.array([[pos_x, pos_y], [pos_x + height, pos_y + width]]))
 
         sheet = Expr("sheet", Expr("at", pos_x, pos_y), Expr("size", width, height),
-                     Expr("fields_autoplaced"), from_str("(stroke (width 0) (type solid) (color 0 0 0 0))"),
-                     from_str("(fill (color 0 0 0 0.0000))"), Expr("uuid", uuid4()),
+                     Expr("fields_autoplaced"), sheet_stroke.clone(),
+                     sheet_fill.clone(), Expr("uuid", uuid4()),
                      Expr("property", '"Sheet name"', f'"{sheet_name}"', Expr("id", 0), Expr("at", pos_x, pos_y, 0),
-                          from_str("(effects (font (size 1.27 1.27)) (justify left bottom))")),
+                          sheet_property_effects.clone()),
                      Expr("property", '"Sheet file"', f'"{file_name}"', Expr("id", 1),
                           Expr("at", pos_x, pos_y + height + 2.54, 0),
-                          from_str("(effects (font (size 1.27 1.27)) (justify left bottom))")))
+                          sheet_property_effects.clone()))
         i = 0
         for label in labels.values():
             # build a new pin, (at x y angle)
             i += 1
             sheet.append(Expr("pin", label[0], label.shape[0], Expr("at", pos_x, pos_y + i * 2.54, 0),
-                              from_str("(effects (font (size 1.27 1.27)) (justify right))"), Expr("uuid", uuid4())))
+                              sheet_pin_effects.clone(), Expr("uuid", uuid4())))
 
         return (box, sheet)
 
@@ -130,15 +154,18 @@ class Schematic:
             )
 
     def draw(self) -> list:
-        """draw the whole schematic"""
+        """draw the whole schematic, returns the lines of the svg"""
+        # shapes which aren't drawn (hidden text, pins) come back as None
+        return list(filter(None, self._draw()))
+
+    def _draw(self) -> Iterator[str | None]:
         svg_header = """<svg version="2.0" viewBox="0 0 297 210" width="297mm" height="210mm" xmlns="http://www.w3.org/2000/svg">"""
-        lines = []
-        lines.append(svg_header)
+        yield svg_header
 
         for sym in self._sch.symbol:
             sym_name = sym.lib_id[0].strip('"')
 
-            lines.append(f"<!--drawing {sym_name} -->")
+            yield f"<!--drawing {sym_name} -->"
 
             for expr in self._sch.lib_symbols.symbol[sym_name]:
                 # loop the inner symbol once more
@@ -152,40 +179,39 @@ class Schematic:
                                 pt.data[1] = -pt.data[1]
 
                         if isinstance(e, Drawable):
-                            lines.append(e.draw(sym.at))
+                            yield e.draw(sym.at)
                 elif isinstance(expr, Drawable) and expr.name not in [
                     "property"]:  # draw instances which aren't symbols
-                    lines.append(expr.draw(sym.at))
+                    yield expr.draw(sym.at)
 
             for expr in sym:
                 if isinstance(expr, Drawable):
-                    lines.append(expr.draw((0, 0, sym.at[2])))
+                    yield expr.draw((0, 0, sym.at[2]))
 
-        lines.append("<!--drawing wires -->")
+        yield "<!--drawing wires -->"
         for wire in self._sch.wire:
-            lines.append(wire.draw(()))
+            yield wire.draw(())
 
-        lines.append("<!--drawing junk -->")
+        yield "<!--drawing junk -->"
         for j in self._sch.junction:
-            lines.append(j.draw(()))
+            yield j.draw(())
 
-        lines.append("<!--drawing text -->")
+        yield "<!--drawing text -->"
         for t in self._sch:
             if t.name == "text":
-                lines.append(t.draw(()))
+                yield t.draw(())
 
-        lines.append("<!--drawing labels -->")
+        yield "<!--drawing labels -->"
         for t in self._sch:
             if t.name == "label":
-                lines.append(t.draw(()))
+                yield t.draw(())
 
-        lines.append("<!--drawing polylines -->")
+        yield "<!--drawing polylines -->"
         for t in self._sch:
             if t.name == "polyline":
-                lines.append(t.draw(((0,0))))
+                yield t.draw(((0,0)))
 
-        lines.append('</svg>')
-        return lines
+        yield '</svg>'
 
 
 class PCB:
@@ -200,32 +226,43 @@ class PCB:
         self._pcb = pcb
         self.name = name
         self.file_name = file_name
+        # computed on first use, reset by move and append
+        self._bounding_box = None
 
     def as_expr(self) -> Expr:
-        """ return the schematic as an Expr """
+        """ return the pcb as an Expr
+        the PCB doesn't notice changes made to it, call bounding_box(recompute=True) after moving things around
+        """
         return self._pcb
 
-    def bounding_box(self) -> BoundingBox:
+    def bounding_box(self, recompute: bool = False) -> BoundingBox:
         """ bounding_box calculates and returns the BoundingBox of a PCB
+        the result is kept until the PCB is moved or appended to, pass recompute=True after changing the expression
+        returned by as_expr directly. every call returns a copy which the caller is free to change.
         """
-        flatten = lambda l: sum(map(flatten, l), []) if isinstance(l, list) else [l]
-
-        footprints = flatten(
-            self._pcb.apply(Footprint, methodcaller("bounding_box")))  # return value is a list of single element lists
-        polygons = flatten(self._pcb.apply(Polygon, methodcaller("bounding_box")))
-        fp_line = flatten(self._pcb.apply(FPLine, methodcaller("bounding_box")))
-
-        all_boxes = []
-        all_boxes.extend(footprints)
-        all_boxes.extend(polygons)
-        all_boxes.extend(fp_line)
-
+        if self._bounding_box is None or recompute:
+            self._bounding_box = self._compute_bounding_box()
+        return copy(self._bounding_box)
+
+    def _compute_bounding_box(self) -> BoundingBox:
+        """walk the whole board for the bounding box"""
+
+        # one walk over the board for all types, apply nests the results like the expressions they came from
+        boxes = self._pcb.apply((Footprint, Polygon, FPLine), methodcaller("bounding_box"))
+
+        corners = []
+        stack = [boxes] if boxes is not None else []
+        while stack:
+            for item in stack.pop():
+                if isinstance(item, list):
+                    stack.append(item)
+                elif item.valid:
+                    corners.append(item.corners)
+
+        # add bounding boxes together, the order doesn't matter for min and max
         outer = BoundingBox([])
-
-        # add bounding boxes together
-        for box in all_boxes:
-            if box is not None:
-                outer.envelop(box.corners)
+        if corners:
+            outer.envelop(np.concatenate(corners))
 
         return outer
 
@@ -233,6 +270,7 @@ class PCB:
         """ move a pcb with relative coordinates
         """
         self._pcb.apply(Movable, methodcaller("move_xy", x, y))
+        self._bounding_box = None
 
     def append(self, pcbs: List[Tuple[str, PCB]]):
         """
@@ -278,6 +316,8 @@ class PCB:
                     else:
                         self._pcb.data.extend(sub_expr)
 
+            self._bounding_box = None
+
         # refresh known attributes, etc
         self._pcb.parsed()
 
@@ -294,14 +334,21 @@ class Project:
     sheets: int  # sheets is the amount of schematics including all instances of sub-schematics
     pcb: PCB
 
-    def __init__(self, sch_file_name: str, pcb_file_name: str) -> None:
+    def __init__(self, sch_file_name: str, pcb_file_name: str, cache_dir: str | None = None) -> None:
+        """
+        cache_dir optionally names a directory where parsed files are pickled, so that files which didn't change are
+        loaded from there on the next run instead of being parsed again. only point it to a directory you trust,
+        loading a pickle can run arbitrary code.
+        """
         self.sch_file_name = sch_file_name
         self.pcb_file_name = pcb_file_name
+        self.cache_dir = cache_dir
+        # sub-sheet paths are relative to the top level schematic
+        self._dir_name = os.path.dirname(sch_file_name)
 
     def parse(self):
         """parse the base schematic and PCB file"""
-        with open(self.sch_file_name, encoding="utf-8") as sch_file:
-            sch = from_str(sch_file.read())
+        sch = self._from_file(self.sch_file_name)
 
         if sch.version[0] < 20211123:
             raise VersionError("kicad file format versions pre-6.0.0 are unsupported")
@@ -315,28 +362,26 @@ class Project:
                 if reference[0] == "#":
                     continue
 
-                symbol_id = list(filter(None, path[0][1:-1].split("/")))[-1]
+                # the symbol's uuid is the last segment of the path
+                symbol_id = path[0][1:-1].rstrip("/").rpartition("/")[2]
 
                 if symbol_id in self.symbol_instances:
                     self.symbol_instances[symbol_id].append(reference)
                 else:
                     self.symbol_instances[symbol_id] = [reference]
 
-        self.top = sch.uuid[0]
+        self.top = _schematic_uuid(sch, self.sch_file_name)
         self._parse_sheet(sch, self.sch_file_name)
 
         # parse the PCB
-        with open(self.pcb_file_name, encoding="utf-8") as pcb_file:
-            self.pcb = PCB(from_str(pcb_file.read()), "", self.pcb_file_name)
+        self.pcb = PCB(self._from_file(self.pcb_file_name), "", self.pcb_file_name)
 
     def _parse_sheet(self, sch: Expr, file_name: str):
         """recursively parse schematic sub-sheets"""
-        uuid = sch.uuid[0]
+        uuid = _schematic_uuid(sch, file_name)
         self.schematics[uuid] = Schematic(sch, "", file_name)
         self.fn_to_uuid[os.path.basename(file_name)] = uuid
 
-        dir_name = os.path.dirname(self.sch_file_name)
-
         if not hasattr(sch, "sheet"):
             return
 
@@ -346,6 +391,7 @@ class Project:
         if sheets[0].name != "sheet":
             sheets = [sheets]
 
+        sheet_files = {}
         for sheet in sheets:
             try:
                 prop = sheet.property
@@ -363,11 +409,52 @@ class Project:
                 raise ValueError("unknown property key for sheet file")
 
             sheet_file = prop[sheet_file_key][1].strip('"')
-            if os.path.basename(sheet_file) not in self.fn_to_uuid:
-                with open(os.path.join(dir_name, sheet_file), encoding="utf-8") as sch_file:
-                    sub = from_str(sch_file.read())
-
-                self._parse_sheet(sub, sheet_file)
+            base_name = os.path.basename(sheet_file)
+            if base_name not in self.fn_to_uuid and base_name not in sheet_files:
+                sheet_files[base_name] = sheet_file
+
+        # read the sub-sheets in parallel, parsing them stays on this thread. with a cache most of them won't be
+        # read at all, so they're only read when needed
+        paths = [os.path.join(self._dir_name, sheet_file) for sheet_file in sheet_files.values()]
+        contents = _read_files(paths) if self.cache_dir is None else [None] * len(paths)
+        for (base_name, sheet_file), path, text in zip(sheet_files.items(), paths, contents):
+            # a sheet we parsed in the meantime might have included this one too
+            if base_name not in self.fn_to_uuid:
+                self._parse_sheet(self._from_file(path, text), sheet_file)
+
+    def _from_file(self, path: str, text: str | None = None) -> Expr:
+        """parse a file, or load it from the cache if it hasn't changed since it was cached"""
+        if self.cache_dir is None:
+            return from_str(_read_file(path) if text is None else text)
+
+        stat = os.stat(path)
+        key = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()
+        cache_file = os.path.join(self.cache_dir, f"{key}_{stat.st_mtime_ns}_{stat.st_size}_{CACHE_FORMAT}.pickle")
+        try:
+            with open(cache_file, "rb") as file:
+                # the cache directory is trusted by the caller, see __init__
+                cached = pickle.load(file)  # nosec B301
+            if isinstance(cached, Expr):
+                return cached
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError, TypeError,
+                ValueError):
+            # missing, or written by a different version of edea (or something else entirely), parse it again
+            pass
+
+        expr = from_str(_read_file(path) if text is None else text)
+
+        # write to a temporary file first so that a concurrent run never sees a partial pickle
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, "wb") as file:
+                pickle.dump(expr, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        finally:
+            # only left over if writing or renaming it failed
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+        return expr
 
     @staticmethod
     def _key_unique_part(sym: Expr) -> str:
@@ -383,28 +470,24 @@ class Project:
     def metadata(self) -> dict:
         """parse metadata from the schematic"""
         self.sheets = 0
-        parts = []
         top = self.schematics[self.top].as_expr()
 
-        parts += self._get_parts(top, f"/{top.uuid}")
-
-        groups = []  # parts with the same footprint and value
-        unique_keys = []  # part keys, footprint + value or MPN if set
-        for k, g in groupby(parts, key=Project._key_unique_part):
-            groups.append(list(g))  # Store group iterator as a list
-            unique_keys.append(k)
+        parts = list(self._get_parts(top, f"/{top.uuid}"))
 
+        # parts with the same footprint and value count once, keyed by footprint + value or MPN if set.
+        unique_keys = set()
         bom_parts = {}
 
         for sym in parts:
+            unique_keys.add(Project._key_unique_part(sym))
+
             # expand the properties and add list of instances
-            properties = {}
-            for prop in sym.property:
-                properties[prop] = sym.property[prop][1][1:-1]
+            properties = {key: prop[1][1:-1] for key, prop in sym.property.items()}
 
-            properties["Reference"] = self.symbol_instances[sym.uuid[0]]
+            uuid = sym.uuid[0]
+            properties["Reference"] = self.symbol_instances[uuid]
 
-            bom_parts[sym.uuid[0]] = properties
+            bom_parts[uuid] = properties
 
         box = self.pcb.bounding_box()
 
@@ -418,12 +501,18 @@ class Project:
 
         return bom
 
-    def _get_parts(self, sch, path) -> list:
+    def _get_parts(self, sch, path) -> Iterator[Expr]:
+        """yield the real parts of a schematic and its sub-schematics, counting the sheets on the way"""
         self.sheets += 1
 
-        # don't trust the linter, it's telling lies here
-        parts = list(
-            filterfalse(lambda sym: sym.property["Reference"][1].startswith('"#') or sym.in_bom is False, sch.symbol, ))
+        # skip virtual parts like power symbols and parts which are excluded from the BOM
+        for sym in sch.symbol:
+            if sym.property["Reference"][1].startswith('"#'):
+                continue
+            in_bom = getattr(sym, "in_bom", None)
+            if in_bom is not None and in_bom[0] == "no":
+                continue
+            yield sym
 
         # recurse sub-schematics
         if hasattr(sch, "sheet"):
@@ -431,6 +520,18 @@ class Project:
                 prop = sheet.property
                 sheet_fn = prop["Sheet file"][1].strip('"')
                 sch = self.schematics[self.fn_to_uuid[sheet_fn]].as_expr()
-                parts += self._get_parts(sch, f"{path}/{sch.uuid}")
+                yield from self._get_parts(sch, f"{path}/{sch.uuid}")
+
+
+def _read_file(path: str) -> str:
+    with open(path, encoding="utf-8") as file:
+        return file.read()
+
+
+def _read_files(paths: List[str]) -> List[str]:
+    """read files concurrently, threads overlap the waiting on the disk even with the GIL"""
+    if len(paths) < 2:
+        return [_read_file(path) for path in paths]
 
-        return parts
+    with ThreadPoolExecutor() as pool:
+        return list(pool.map(_read_file, paths))
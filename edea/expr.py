@@ -0,0 +1,315 @@
+"""
+The expression tree of the KiCad file format parser
+
+SPDX-License-Identifier: EUPL-1.2
+"""
+from __future__ import annotations
+
+from copy import copy, deepcopy
+
+Number = (int, float)
+
+# slots which point into data, copies start without them and rebuild them on demand like clone() does
+_TRANSIENT_SLOTS = frozenset(["_by_name", "_attr_cache"])
+# attribute index shared by all expressions without sub-expressions, it's only ever read
+_NO_SUB_EXPRS: dict = {}
+
+
+class Expr:
+    """
+    Expr lisp-y kicad expressions
+
+    The sub-expressions and atoms are kept in the plain list data, Expr forwards the list methods we need to it.
+    There can be hundreds of thousands of these in a board, so they have __slots__ and no __dict__.
+    """
+
+    __slots__ = ("name", "data", "_by_name", "_attr_cache")
+
+    name: str
+    data: list
+
+    _by_name: dict | None
+    _attr_cache: dict | None
+
+    def __init__(self, typ: str, *args) -> None:
+        """__init__ builds a new pin with typ as the type
+        passing additional arguments will append them to the list and Expr.parsed() will be called afterwards
+        to update the internals.
+        """
+        self.name = typ
+        self.data = []
+        # the attribute index is built lazily on the first __getattr__, most nodes never need it
+        self._by_name = None
+        self._attr_cache = None
+
+        # optionally initialize with anything thrown at init
+        if len(args) > 0:
+            self.extend(args)
+            self.parsed()
+
+    def __str__(self) -> str:
+        parts = []
+        self._serialize(parts.append)
+        return "".join(parts)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(name={self.name!r}, data={self.data!r})"
+
+    def write(self, out) -> None:
+        """write writes the same text as str() to the text stream out without building the whole string first"""
+        self._serialize(out.write)
+
+    def _serialize(self, emit) -> None:
+        """
+        pass the text of the expression to emit piece by piece
+
+        the tree is walked with an explicit stack so that every node costs a few appends instead of a nested join.
+        sub-classes which format themselves differently (e.g. Pts) are emitted with their own __str__.
+        """
+        stack = [iter((self,))]
+        first = True
+        while stack:
+            for item in stack[-1]:
+                if first:
+                    first = False
+                else:
+                    emit(" ")
+                if isinstance(item, Expr) and type(item).__str__ is Expr.__str__:
+                    emit(f"\n({item.name} ")
+                    stack.append(iter(item.data))
+                    first = True
+                    break
+                emit(item.__str__())
+            else:
+                stack.pop()
+                # the outermost iterator only holds self
+                if stack:
+                    emit(")")
+                first = False
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __contains__(self, item) -> bool:
+        return item in self.data
+
+    def __getitem__(self, i):
+        return self.data[i]
+
+    def __setitem__(self, i, item) -> None:
+        self.data[i] = item
+        self.parsed()
+
+    def __delitem__(self, i) -> None:
+        del self.data[i]
+        self.parsed()
+
+    def insert(self, i: int, item) -> None:
+        """insert item at position i"""
+        self.data.insert(i, item)
+        self.parsed()
+
+    def pop(self, i: int = -1):
+        """remove and return the item at position i"""
+        item = self.data.pop(i)
+        self.parsed()
+        return item
+
+    def remove(self, item) -> None:
+        """remove the first occurrence of item"""
+        self.data.remove(item)
+        self.parsed()
+
+    def index(self, item, *args) -> int:
+        """index of the first occurrence of item"""
+        return self.data.index(item, *args)
+
+    def count(self, item) -> int:
+        """count how often item occurs"""
+        return self.data.count(item)
+
+    def apply(self, cls, func) -> list | None:
+        """
+        call func on all objects in data recursively which match the type
+
+        to call an instance method, just use e.g. v.apply(Pad, methodcaller("move_xy", x, y))
+
+        the results are nested like the expressions they came from, sub-trees without results are left out.
+        the tree is walked with an explicit stack instead of recursion, func is still called in document order.
+        """
+        vals = []
+        if isinstance(self, cls):
+            ret = func(self)
+            if ret is not None:
+                vals.append(ret)
+
+        # the remaining sub-expressions and the results of each expression on the current path
+        items_stack = [iter(self.data)]
+        vals_stack = [vals]
+        while items_stack:
+            for item in items_stack[-1]:
+                if isinstance(item, Expr):
+                    item_vals = []
+                    if isinstance(item, cls):
+                        ret = func(item)
+                        if ret is not None:
+                            item_vals.append(ret)
+                    items_stack.append(iter(item.data))
+                    vals_stack.append(item_vals)
+                    break
+            else:
+                items_stack.pop()
+                item_vals = vals_stack.pop()
+                if item_vals and vals_stack:
+                    vals_stack[-1].append(item_vals)
+
+        if len(vals) == 0:
+            return None
+        return vals
+
+    def append(self, item) -> None:
+        """append adds item to data and resets the attribute index if there is one"""
+        self.data.append(item)
+        if self._by_name is not None:
+            self.parsed()
+
+    def extend(self, other) -> None:
+        """extend adds the items of other to data and resets the attribute index if there is one"""
+        self.data.extend(other)
+        if self._by_name is not None:
+            self.parsed()
+
+    def parsed(self):
+        """parsed resets the attribute index and cache, they will be rebuilt on the next attribute access
+
+        call this after modifying data directly so that newly added sub-expressions can be accessed as attributes.
+        """
+        self._by_name = None
+        self._attr_cache = None
+
+    def _index_attrs(self) -> dict:
+        """walk data once to group the sub-expressions by name"""
+        by_name = {}
+        for item in self.data:
+            if isinstance(item, Expr):
+                by_name.setdefault(item.name, []).append(item)
+
+        # leaves share one read-only index instead of keeping an empty dict each
+        self._by_name = by_name or _NO_SUB_EXPRS
+        return self._by_name
+
+    def __getattr__(self, name) -> list | dict | str:
+        """
+        make items from data callable via the attribute syntax
+        this allows us to work with sub-expressions just like one would intuitively expect it
+        combined with the index operator we can do things like: effects.font.size[0]
+        this is much less verbose and conveys intent instantly.
+        """
+        # our own slots and python internals (e.g. __setstate__ for copy and pickle) are never sub-expressions,
+        # looking them up in data would recurse when the slots aren't set yet
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        cache = self._attr_cache
+        if cache is not None and name in cache:
+            return cache[name]
+
+        by_name = self._by_name
+        if by_name is None:
+            by_name = self._index_attrs()
+
+        items = by_name.get(name)
+        if items is None:
+            raise AttributeError(name)
+
+        value = self._lookup_attr(name, items, by_name)
+        if cache is None:
+            self._attr_cache = cache = {}
+        cache[name] = value
+        return value
+
+    def _lookup_attr(self, name: str, items: list, by_name: dict) -> list | dict | str:
+        """turn the sub-expressions called name into the attribute value, see __getattr__"""
+        if len(items) == 1:
+            # an atom spelled like the sub-expression which comes first wins
+            for item in self.data:
+                if isinstance(item, str):
+                    if item == name:
+                        return item
+                elif item.name == name:
+                    return item
+
+        # repeated sub-expressions can only be looked up on nodes without atoms, e.g. a footprint's pads
+        # are not accessible because the footprint also carries its library name
+        if sum(map(len, by_name.values())) != len(self.data):
+            raise AttributeError(name)
+
+        # use data[0] as dict key in case there's no duplicates
+        # this allows us to access e.g. properties by their key
+        dict_items = {}
+        for item in items:
+            if isinstance(item[0], Expr) or item[0] in dict_items:
+                return items
+            dict_items[item[0].strip('"')] = item
+
+        return dict_items
+
+    def __eq__(self, other) -> bool:
+        """Overrides the default implementation"""
+        if len(self.data) != 1:
+            return self.name == other
+            # raise NotImplementedError
+
+        if other is True or other is False:
+            return self[0] == "yes" and other
+        if isinstance(other, Number):
+            return self[0] == other.number
+
+        return False
+
+    def startswith(self, prefix):
+        """startswith implements prefix comparison for single element lists"""
+        if len(self.data) != 1:
+            raise NotImplementedError
+
+        return self[0].startswith(prefix)
+
+    def clone(self) -> Expr:
+        """clone returns a deep copy of the expression tree, the attribute index and cache are rebuilt on demand"""
+        c = type(self)(self.name)
+        c.data = [item.clone() if isinstance(item, Expr) else item for item in self.data]
+        return c
+
+    def __copy__(self):
+        c = type(self)(typ=self.name)
+        for name in _all_slots(type(self)):
+            if name not in _TRANSIENT_SLOTS:
+                setattr(c, name, copy(getattr(self, name)))
+        return c
+
+    def __deepcopy__(self, memo):
+        c = type(self)(typ=self.name)
+        memo[id(self)] = c
+        for name in _all_slots(type(self)):
+            if name not in _TRANSIENT_SLOTS:
+                setattr(c, name, deepcopy(getattr(self, name), memo))
+        return c
+
+    def __reduce__(self):
+        # only the tree itself is pickled, the attribute index and cache are rebuilt on demand
+        return (_unpickle, (type(self), self.name, self.data))
+
+
+def _unpickle(cls, name: str, data: list) -> Expr:
+    """rebuild an expression pickled by Expr.__reduce__"""
+    expr = cls(name)
+    expr.data = data
+    return expr
+
+
+def _all_slots(cls) -> list:
+    """collect the slots of cls and all of its base classes"""
+    return [name for klass in cls.__mro__ for name in klass.__dict__.get("__slots__", ())]
@@ -6,10 +6,11 @@ SPDX-License-Identifier: EUPL-1.2
 from __future__ import annotations
 
 import re
-from copy import deepcopy, copy
+import sys
 from _operator import methodcaller
-from collections import UserDict, UserList
+from collections import UserDict
 from dataclasses import dataclass
+from functools import wraps
 from math import acos, cos, degrees, radians, sin, tau
 from typing import Dict, Tuple, Union
 from uuid import UUID, uuid4
@@ -17,13 +18,13 @@ from uuid import UUID, uuid4
 import numpy as np
 
 from .bbox import BoundingBox
+from .expr import Expr, Number
 
 Symbol = str
-Number = (int, float)
 Atom = (Symbol, Number)
 
 # types which have children with absolute coordinates
-to_be_moved = [
+to_be_moved = frozenset([
     "footprint",
     "gr_text",
     "gr_poly",
@@ -37,13 +38,13 @@ to_be_moved = [
     "arc",
     "polygon",
     "filled_polygon",
-]  # pts is handled separately
-skip_move = ["primitives"]
+])  # pts is handled separately
+skip_move = frozenset(["primitives"])
 
 # types which should be moved if their parent is in the set of "to_be_moved"
-movable_types = ["at", "xy", "start", "end", "center", "mid"]
+movable_types = frozenset(["at", "xy", "start", "end", "center", "mid"])
 
-drawable_types = [
+drawable_types = frozenset([
     "pin",
     "polyline",
     "rectangle",
@@ -53,221 +54,207 @@ drawable_types = [
     "junction",
     "text",
     "label",
-]
+])
+polygon_types = frozenset(["polygon", "filled_polygon"])
 lib_symbols = {}
-TOKENIZE_EXPR = re.compile(r'("[^"\\]*(?:\\.[^"\\]*)*"|\(|\)|"|[^\s()"]+)')
+# same pattern as the types parser: atoms, parentheses, quoted strings and
+# finally a lone quote that doesn't start a complete string
+TOKENIZE_EXPR = re.compile(r'[^\s()"]+|[()]|"[^"\\]*(?:\\.[^"\\]*)*"|"')
+# complete quoted strings, captured so that re.split keeps them
+QUOTED_STRING = re.compile(r'("[^"\\]*(?:\\.[^"\\]*)*")')
+# atoms shorter than this are interned, kicad files repeat the same names, layers and flags over and over
+# again so sharing one string object for each of them saves a lot of memory and makes comparisons cheaper
+INTERN_MAX_LEN = 64
 
 
-@dataclass
-class Expr(UserList):
-    """Expr lisp-y kicad expressions"""
+def _unpickle_pts(cls, name: str, data: list, coords: list) -> Pts:
+    """rebuild points pickled by Pts.__reduce__"""
+    pts = cls(name, coords=coords)
+    pts.data = data
+    return pts
 
-    __slots__ = ("name", "data", "_more_than_once", "_known_attrs")
 
-    name: str
-    data: list
+class Movable(Expr):
+    """Movable is an object with a position"""
 
-    _more_than_once: set
-    _known_attrs: set
+    __slots__ = ()
 
-    def __init__(self, typ: str, *args) -> None:
-        """__init__ builds a new pin with typ as the type
-        passing additional arguments will append them to the list and Expr.parsed() will be called afterwards
-        to update the internals.
-        """
-        super().__init__()
-        self.name = typ
-        self._known_attrs = set()
-        self._more_than_once = set()
+    def move_xy(self, x: float, y: float) -> None:
+        """move_xy adds the position offset x and y to the object"""
+        self.data[0] += x
+        self.data[1] += y
 
-        # optionally initialize with anything thrown at init
-        if len(args) > 0:
-            self.extend(args)
-            self.parsed()
 
-    def __str__(self) -> str:
-        sub = " ".join(map(methodcaller("__str__"), self.data))
-        return f"\n({self.name} {sub})"
+def _unpacking(method):
+    """wrap an Expr method which works on data so that it sees the packed points of Pts as well"""
 
-    def apply(self, cls, func) -> list | None:
-        """
-        call func on all objects in data recursively which match the type
+    @wraps(method)
+    def wrapper(self, *args):
+        self.unpack()
+        return method(self, *args)
 
-        to call an instance method, just use e.g. v.apply(Pad, methodcaller("move_xy", x, y))
-        """
-        vals = []
+    return wrapper
 
-        if isinstance(self, cls):
-            ret = func(self)
-            if ret is not None:
-                vals.append(ret)
 
-        if len(self.data) > 0:
-            for item in self.data:
-                if isinstance(item, Expr):
-                    ret = item.apply(cls, func)
-                    if ret is not None:
-                        vals.append(ret)
+class Pts(Movable):
+    """
+    Pts is a list of points with absolute positions
 
-        if len(vals) == 0:
-            return None
-        return vals
-
-    def parsed(self):
-        """subclasses can parse additional stuff out of data now"""
-        # TODO: currently modifying the object and accessing fields again is not handled
-        for item in self.data:
-            if not isinstance(item, Expr):
-                continue
-
-            if item.name in self._known_attrs:
-                if item.name not in self._more_than_once:
-                    self._more_than_once.add(item.name)
-            else:
-                self._known_attrs.add(item.name)
+    The leading xy points are stored as a flat list of coordinates in _xy instead of one Expr per point, which is
+    a lot smaller for point-dense zones. The numbers are kept as they were read, so they are written just like
+    the atoms of an Expr. Once there is any other kind of point (e.g. an arc) in data, everything after it goes
+    to data as well so that the order of points is preserved. Reading the points like a list turns the packed
+    coordinates back into xy sub-expressions.
+    """
 
-    def __getattr__(self, name) -> list | dict | str:
-        """
-        make items from data callable via the attribute syntax
-        this allows us to work with sub-expressions just like one would intuitively expect it
-        combined with the index operator we can do things like: effects.font.size[0]
-        this is much less verbose and conveys intent instantly.
-        """
-        if name not in self._known_attrs:
-            return UserList.__getattribute__(self, name)
-
-        if name not in self._more_than_once:
-            for item in self.data:
-                if isinstance(item, str):
-                    if item == name:
-                        return item
-                elif item.name == name:
-                    return item
-
-        dict_items = {}
-        items = []
-        skip = False
-
-        # use data[0] as dict key in case there's no duplicates
-        # this allows us to access e.g. properties by their key
-        for item in self.data:
-            if item.name == name:
-                if not skip:
-                    if isinstance(item[0], Expr) or item[0] in dict_items:
-                        skip = True
-                    else:
-                        dict_items[item[0].strip('"')] = item
-                items.append(item)
-
-        if not skip:
-            return dict_items
-        return items
-
-    def __eq__(self, other) -> bool:
-        """Overrides the default implementation"""
-        if len(self.data) != 1:
-            return self.name == other
-            # raise NotImplementedError
-
-        if other is True or other is False:
-            return self[0] == "yes" and other
-        if isinstance(other, Number):
-            return self[0] == other.number
-
-        return False
-
-    def startswith(self, prefix):
-        """startswith implements prefix comparison for single element lists"""
-        if len(self.data) != 1:
-            raise NotImplementedError
-
-        return self[0].startswith(prefix)
-
-    def __copy__(self):
-        c = type(self)(typ=self.name)
-        for name in self.__slots__:
-            value = copy(getattr(self, name))
-            setattr(c, name, value)
-        return c
+    __slots__ = ("_xy",)
 
-    def __deepcopy__(self, memo):
-        c = type(self)(typ=self.name)
-        memo[id(self)] = c
-        for name in self.__slots__:
-            value = deepcopy(getattr(self, name))
-            setattr(c, name, value)
-        return c
+    _xy: list
+
+    def __init__(self, typ: str, *args, coords: list | None = None) -> None:
+        """coords optionally passes the packed coordinates to start with"""
+        self._xy = [] if coords is None else coords
+        super().__init__(typ, *args)
 
+    def __str__(self) -> str:
+        coords = self._xy
+        points = [f"\n(xy {x} {y})" for x, y in zip(coords[0::2], coords[1::2])]
+        points.extend(map(methodcaller("__str__"), self.data))
+        return f"\n({self.name} {' '.join(points)})"
 
+    def __len__(self) -> int:
+        return len(self._xy) // 2 + len(self.data)
 
-@dataclass(init=False)
-class Movable(Expr):
-    """Movable is an object with a position"""
+    def __getattr__(self, name) -> list | dict | str:
+        if not name.startswith("_"):
+            self.unpack()
+        return super().__getattr__(name)
+
+    def append(self, item) -> None:
+        """append packs xy points into the coordinate list, everything else is stored as a sub-expression"""
+        if isinstance(item, Expr) and item.name == "xy" and len(item.data) == 2:
+            self.append_xy(item.data[0], item.data[1])
+        else:
+            super().append(item)
 
-    def move_xy(self, x: float, y: float) -> None:
-        """move_xy adds the position offset x and y to the object"""
-        self.data[0] += x
-        self.data[1] += y
+    def __reduce__(self):
+        return (_unpickle_pts, (type(self), self.name, self.data, self._xy))
 
+    def clone(self) -> Pts:
+        """clone returns a deep copy including the packed points"""
+        c = type(self)(self.name, coords=self._xy.copy())
+        c.data = [item.clone() if isinstance(item, Expr) else item for item in self.data]
+        return c
 
-@dataclass(init=False)
-class Pts(Movable):
-    """Movable is an object with a position"""
+    def append_xy(self, x: float, y: float) -> None:
+        """append_xy adds a point without creating an Expr for it if there are only packed points so far"""
+        if self.data:
+            super().append(Expr("xy", x, y))
+        else:
+            self._xy += (x, y)
+
+    def unpack(self) -> None:
+        """convert the packed coordinates into xy sub-expressions"""
+        coords = self._xy
+        if coords:
+            self._xy = []
+            self.data[0:0] = [Expr("xy", x, y) for x, y in zip(coords[0::2], coords[1::2])]
+            self.parsed()
+
+    def xy_array(self) -> np.ndarray | None:
+        """returns a copy of the packed points as a (n,2) numpy array"""
+        if not self._xy:
+            return None
+        return np.array(self._xy, dtype=np.float64).reshape(-1, 2)
+
+    __iter__ = _unpacking(Expr.__iter__)
+    __contains__ = _unpacking(Expr.__contains__)
+    __getitem__ = _unpacking(Expr.__getitem__)
+    __setitem__ = _unpacking(Expr.__setitem__)
+    __delitem__ = _unpacking(Expr.__delitem__)
+    __eq__ = _unpacking(Expr.__eq__)
+    insert = _unpacking(Expr.insert)
+    pop = _unpacking(Expr.pop)
+    remove = _unpacking(Expr.remove)
+    index = _unpacking(Expr.index)
+    count = _unpacking(Expr.count)
+    startswith = _unpacking(Expr.startswith)
 
     def move_xy(self, x: float, y: float) -> None:
         """move_xy adds the position offset x and y to the object"""
+        coords = self._xy
+        coords[0::2] = [value + x for value in coords[0::2]]
+        coords[1::2] = [value + y for value in coords[1::2]]
+
         for point in self.data:
             if point.name == "xy":
                 point.data[0] += x
                 point.data[1] += y
 
 
-@dataclass(init=False)
+# pad shapes whose extent is approximated by scaling a unit shape, and the unit shapes themselves
+_BOX_PAD_SHAPES = frozenset(["rect", "roundrect", "oval", "custom"])
+_SQUARE_CORNERS = np.array([[1, 1], [1, -1], [-1, 1], [-1, -1]], dtype=np.float64)
+_DIAMOND_CORNERS = np.array([[1, 0], [-1, 0], [0, 1], [0, -1]], dtype=np.float64)
+
+
 class Pad(Expr):
     """Pad"""
 
+    __slots__ = ("_corners",)
+
+    _corners: tuple | None
+
+    def __init__(self, typ: str, *args) -> None:
+        self._corners = None
+        super().__init__(typ, *args)
+
     def corners(self):
-        """Returns a numpy array containing every corner [x,y]"""
-        if len(self.at) > 2:
-            angle = self.at.data[2] / tau
+        """
+        Returns a numpy array containing every corner [x,y]
+
+        The corners are cached together with the shape, position and size they were computed from, they are only
+        computed again if one of those changed. Callers get their own copy, changing it doesn't touch the cache.
+        """
+        at = self.at.data  # in this case we explicitly need the data list, slicing the Expr would return a list
+        shape = self[2]
+        if shape not in _BOX_PAD_SHAPES and shape != "circle":
+            raise NotImplementedError(f"pad shape {shape} is not implemented")
+
+        key = (shape, *at, *self.size.data)
+        if self._corners is not None and self._corners[0] == key:
+            return self._corners[1].copy()
+
+        if len(at) > 2:
+            angle = at[2] / tau
         else:
             angle = 0
-        origin = self.at.data[
-                 0:2
-                 ]  # in this case we explicitly need to access the data list because of the range op
-        # otherwise it would return a list of Expr
-
-        if self[2] in ["rect", "roundrect", "oval", "custom"]:
-            # TODO optimize this, this is called quite often
+        origin = at[0:2]
 
-            points = np.array([[1, 1], [1, -1], [-1, 1], [-1, -1]], dtype=np.float64)
-            if self[2] == "oval":
-                points = np.array([[1, 0], [-1, 0], [0, 1], [0, -1]], dtype=np.float64)
+        if shape == "circle":
+            radius = self.size.data[0] / 2
+            points = origin + _DIAMOND_CORNERS * [radius, radius]
+        else:
+            unit_points = _DIAMOND_CORNERS if shape == "oval" else _SQUARE_CORNERS
             w = self.size.data[0] / 2
             h = self.size.data[1] / 2
             angle_cos = cos(angle)
             angle_sin = sin(angle)
-            for i, _ in enumerate(points):
-                points[i] = origin + points[i] * [
-                    (w * angle_cos + h * angle_sin),
-                    (h * angle_cos + w * angle_sin),
-                ]
-
-        elif self[2] == "circle":
-            points = np.array([[1, 0], [-1, 0], [0, 1], [0, -1]], dtype=np.float64)
-            radius = self.size.data[0] / 2
-            for i, _ in enumerate(points):
-                points[i] = origin + points[i] * [radius, radius]
-        else:
-            raise NotImplementedError(f"pad shape {self[2]} is not implemented")
+            # scale all corners at once, origin and the scale broadcast over the rows
+            points = origin + unit_points * [
+                (w * angle_cos + h * angle_sin),
+                (h * angle_cos + w * angle_sin),
+            ]
 
-        return points
+        self._corners = (key, points)
+        return points.copy()
 
 
-@dataclass(init=False)
 class FPLine(Expr):
     """FPLine"""
 
+    __slots__ = ()
+
     def corners(self):
         """corners returns start and end of the FPLine"""
         points = np.array(
@@ -281,36 +268,37 @@ class FPLine(Expr):
         return BoundingBox(self.corners())
 
 
-@dataclass(init=False)
 class Polygon(Expr):
     """Polygon
     TODO: Zone polygons are with absolute positions, are there other types?
     """
 
+    __slots__ = ()
+
     def bounding_box(self) -> BoundingBox:
         """bounding_box of the polygon"""
         return BoundingBox(self.corners())
 
     def corners(self) -> np.array:
         """corners returns the min and max points of a polygon"""
-        x_points = []
-        y_points = []
-
-        for point in self.pts:
+        pts = self.pts
+        # the packed points come first, then the ones stored as sub-expressions
+        packed = pts.xy_array() if isinstance(pts, Pts) else None
+        for point in pts.data:
             if point.name != "xy":
                 raise NotImplementedError(
                     f"the following polygon format isn't implemented yet: {point}"
                 )
-            x_points.append(point[0])
-            y_points.append(point[1])
 
-        npx = np.array(x_points)
-        npy = np.array(y_points)
+        points = [packed] if packed is not None else []
+        if pts.data:
+            points.append(np.array([point.data for point in pts.data], dtype=np.float64))
+        if not points:
+            raise ValueError("polygon without points")
+        points = np.concatenate(points)
 
-        max_x = np.amax(npx)
-        min_x = np.amin(npx)
-        max_y = np.amax(npy)
-        min_y = np.amin(npy)
+        min_x, min_y = np.amin(points, axis=0)
+        max_x, max_y = np.amax(points, axis=0)
 
         return np.array(
             [
@@ -323,17 +311,18 @@ class Polygon(Expr):
         )
 
 
-@dataclass(init=False)
 class Footprint(Expr):
     """Footprint"""
 
+    __slots__ = ()
+
     def bounding_box(self) -> BoundingBox:
         """return the BoundingBox"""
         box = BoundingBox([])
         if hasattr(self, "pad"):
             # check if it's a single pad only
             if isinstance(self.pad, list):
-                _ = [box.envelop(pad.corners()) for pad in self.pad]
+                box.envelop(np.concatenate([pad.corners() for pad in self.pad]))
             else:
                 box.envelop(self.pad.corners())
 
@@ -380,6 +369,13 @@ class Elem(UserDict):
         else:
             self.data[key] = [value]
 
+    def extend(self, key: str, values: list):
+        """creates and/or appends all values to the given key"""
+        if key in self.data:
+            self.data[key].extend(values)
+        else:
+            self.data[key] = list(values)
+
     def to_string(self) -> str:
         """build a string representation of the current svg element"""
         attrs = []
@@ -393,7 +389,6 @@ class Elem(UserDict):
         return f"<{self.typ} {all_attrs}>{self.inner}</{self.typ}>"
 
 
-@dataclass(init=False)
 class Drawable(Movable):
     """
     Drawable is an object which can be converted to an SVG
@@ -402,12 +397,14 @@ class Drawable(Movable):
     rectangle: usually ic symbols
     """
 
+    __slots__ = ()
+
     svg_precision = 4
 
     def draw(self, position: Tuple[float, float] | Tuple[float, float, float]):
         """draw the shape with the given offset"""
         node = Elem(self.name)
-        self.parse_visual(node, position)
+        at = self.parse_visual(node, position)
 
         # if len(position) == 3 and position[2] != 0:
         #    attrs.append(f'transform="rotate({position[2]})"')
@@ -416,12 +413,14 @@ class Drawable(Movable):
             # raise NotImplementedError(self.name)
             return None
         elif self.name == "polyline":
-            for point in self.data[0]:
-                # rounding is necessary because otherwise you get
-                # numbers ending with .9999999999 due to floating point precision :/
-                x = round(position[0] + point.data[0], self.svg_precision)
-                y = round(position[1] + point.data[1], self.svg_precision)
-                node.append("points", f"{x},{y}")
+            # rounding is necessary because otherwise you get
+            # numbers ending with .9999999999 due to floating point precision :/
+            precision = self.svg_precision
+            x_offset, y_offset = position[0], position[1]
+            node.extend("points", [
+                f"{round(x_offset + point.data[0], precision)},{round(y_offset + point.data[1], precision)}"
+                for point in self.data[0]
+            ])
         elif self.name == "rectangle":
             node.typ = "rect"
             xc, yc = [self.start[0], self.end[0]], [self.start[1], self.end[1]]
@@ -440,11 +439,7 @@ class Drawable(Movable):
             node.append("height", f"{round(height, self.svg_precision)}")
         elif self.name == "wire":
             node.typ = "polyline"
-            for point in self.data[0]:
-                node.append(
-                    "points",
-                    f"{point.data[0]},{point.data[1]}",
-                )
+            node.extend("points", [f"{point.data[0]},{point.data[1]}" for point in self.data[0]])
         elif self.name in ["property", "hierarchical_label", "text", "label"]:
             node.typ = "text"
             has_effects = hasattr(self, "effects")
@@ -461,7 +456,7 @@ class Drawable(Movable):
 
             anchor = "middle"
 
-            x_mid = self.at[0]
+            x_mid = at[0]
 
             font_size = 1.27  # default font size
             if has_effects and hasattr(self.effects, "font"):
@@ -479,7 +474,7 @@ class Drawable(Movable):
 
             node.append("text-anchor", anchor)
 
-            y = self.at[1]
+            y = at[1]
             if self.name in ["property", "hierarchical_label"]:
                 y += font_size / 2
 
@@ -495,14 +490,14 @@ class Drawable(Movable):
             node.append("font-size", f"{font_size}px")
             node.inner = text
         elif self.name == "junction":
-            return f'<circle cx="{self.at[0]}" cy="{self.at[1]}" r="0.5" fill="green" stroke="green" stroke-width="0" />'
+            return f'<circle cx="{at[0]}" cy="{at[1]}" r="0.5" fill="green" stroke="green" stroke-width="0" />'
         else:
             raise NotImplementedError(self.name)
 
         return node.to_string()
 
-    def parse_visual(self, node: Elem, at) -> None:
-        """parse fill/stroke, if present"""
+    def parse_visual(self, node: Elem, at) -> Tuple | Expr | None:
+        """parse fill/stroke, if present and return our position rotated by the given one"""
         attrs = []
         if hasattr(self, "stroke"):
             color, opacity = parse_color(self.stroke.color)
@@ -562,8 +557,10 @@ class Drawable(Movable):
                 original_angle = 0
             offset_y = vector_length * sin(radians(original_angle - angle))
             offset_x = vector_length * cos(radians(original_angle - angle))
-            self.at = (offset_x, offset_y, angle)
             node.append("transform", f"rotate({angle})")
+            return (offset_x, offset_y, angle)
+
+        return self.at if hasattr(self, "at") else None
 
 
 def parse_color(color: list):
@@ -571,12 +568,13 @@ def parse_color(color: list):
     return (f"{color[0]},{color[1]},{color[2]}", color[3])
 
 
-@dataclass(init=False)
 class TStamp(Expr):
     """
     TStamp UUIDv4 identifiers which replace the pcbnew v5 timestamp base ones
     """
 
+    __slots__ = ()
+
     def randomize(self):
         """randomize the tstamp UUID"""
         # parse the old uuid first to catch edgecases
@@ -585,10 +583,11 @@ class TStamp(Expr):
         self.data[0] = str(uuid4())
 
 
-@dataclass(init=False)
 class Net(Expr):
     """Schematic/PCB net"""
 
+    __slots__ = ()
+
     def rename(self, numbers: Dict[int, int], names: Dict[str, str]):
         """rename and/or re-number a net
 
@@ -615,66 +614,148 @@ class Net(Expr):
 
 def from_str(program: str) -> Expr:
     """Parse KiCAD s-expr from a string"""
-    tokens = TOKENIZE_EXPR.findall(program)
+    tokens = tokenize(program)
     _, expr = from_tokens(tokens, 0, "", "")
     return expr
 
 
+def tokenize(program: str) -> list:
+    """
+    Split a string into the same tokens as TOKENIZE_EXPR.findall, but faster
+
+    Only the quoted strings are matched with a regex, everything between them is split with the str methods
+    which don't create a match object per token. A lone quote can only be left over in between strings
+    if the file is broken, those parts are tokenized with the regex.
+    """
+    tokens = []
+    chunks = QUOTED_STRING.split(program)
+    # re.split puts the captured strings at the odd indices
+    tokens_append = tokens.append
+    tokens_extend = tokens.extend
+    for i, chunk in enumerate(chunks):
+        if i & 1:
+            tokens_append(chunk)
+        elif '"' in chunk:
+            tokens_extend(TOKENIZE_EXPR.findall(chunk))
+        else:
+            tokens_extend(chunk.replace("(", " ( ").replace(")", " ) ").split())
+    return tokens
+
+
+# types which get their own class no matter where they are found
+fixed_types = {
+    **dict.fromkeys(drawable_types, Drawable),
+    **dict.fromkeys(polygon_types, Polygon),
+    "pad": Pad,
+    "footprint": Footprint,
+    "fp_line": FPLine,
+    "tstamp": TStamp,
+}
+
+
+def _make_expr(typ: str, parent: str, grand_parent: str) -> Expr:
+    """Create the right kind of Expr for a type name and where it's found."""
+    # TODO: handle more types here
+    cls = fixed_types.get(typ)
+    if cls is not None:
+        return cls(typ)
+    if typ == "pts" and parent in to_be_moved and grand_parent not in skip_move:
+        return Pts(typ)
+    if typ in movable_types and parent in to_be_moved:
+        return Movable(typ)
+    return Expr(typ)
+
+
+# first ascii characters of tokens int() or float() may accept, and the words float() understands
+_NUMBER_START = frozenset("0123456789+-.")
+_FLOAT_WORDS = frozenset(("inf", "infinity", "nan"))
+
+
+def _atom(token: str) -> Union[int, float, str]:
+    """Numbers become numbers, every other token is a symbol"""
+    # most tokens are keywords or quoted strings, don't raise two exceptions for each of them
+    if token[0] in _NUMBER_START or not token[0].isascii():
+        try:
+            return int(token)
+        except ValueError:
+            try:
+                return float(token)
+            except ValueError:
+                pass
+    elif token.lower() in _FLOAT_WORDS:
+        return float(token)
+
+    if len(token) < INTERN_MAX_LEN:
+        return sys.intern(token)
+    return Symbol(token)
+
+
+def _read_pts(tokens: list, index: int, pts: Pts) -> int:
+    """Read plain numeric (xy x y) points straight into the packed coordinates"""
+    # the last point needs its closing parenthesis and the one of pts, anything shorter is left to from_tokens
+    end = len(tokens) - 5
+    while index < end and tokens[index] == "(" and tokens[index + 1] == "xy" and tokens[index + 4] == ")":
+        x = _atom(tokens[index + 2])
+        y = _atom(tokens[index + 3])
+        if not isinstance(x, Number) or not isinstance(y, Number):
+            break
+        pts.append_xy(x, y)
+        index += 5
+    return index
 
 
 def from_tokens(
         tokens: list, index: int, parent: str, grand_parent: str
 ) -> Tuple[int, Union[Expr, int, float, str]]:
-    """Read an expression from a sequence of tokens."""
-    if len(tokens) == index:
+    """
+    Read an expression from a sequence of tokens.
+
+    The unfinished expressions are kept on an explicit stack instead of
+    recursing, so there is no function call per expression and deeply nested
+    files can't run into the recursion limit.
+    """
+    n_tokens = len(tokens)
+    if index == n_tokens:
         raise SyntaxError("unexpected EOF")
     token = tokens[index]
     index += 1
 
-    if token == "(":
-        expr: Expr
-        typ = tokens[index]
-        index += 1
-
-        # TODO: handle more types here
-        if typ in drawable_types:
-            expr = Drawable(typ)
-        elif typ == "pad":
-            expr = Pad(typ)
-        elif typ == "footprint":
-            expr = Footprint(typ)
-        elif typ == "fp_line":
-            expr = FPLine(typ)
-        elif typ in ["polygon", "filled_polygon"]:
-            expr = Polygon(typ)
-        elif typ == "pts" and parent in to_be_moved and grand_parent not in skip_move:
-            expr = Pts(typ)
-        elif typ in movable_types and parent in to_be_moved:
-            expr = Movable(typ)
-        elif typ == "tstamp":
-            expr = TStamp(typ)
-        else:
-            expr = Expr(typ)
-
-        while tokens[index] != ")":
-            index, sub_expr = from_tokens(tokens, index, expr.name, parent)
-            expr.append(sub_expr)
-        index += 1  # remove ')'
-
-        expr.parsed()
-
-        return (index, expr)
-
     if token == ")":
         raise SyntaxError("unexpected )")
+    if token != "(":
+        return (index, _atom(token))
 
-    # Numbers become numbers, every other token is a symbol
-    try:
-        return (index, int(token))
-    except ValueError:
-        try:
-            return (index, float(token))
-        except ValueError:
-            return (index, Symbol(token))
+    if index == n_tokens:
+        raise SyntaxError("unexpected EOF")
+    typ = sys.intern(tokens[index])
+    index += 1
+    expr = _make_expr(typ, parent, grand_parent)
+    if isinstance(expr, Pts):
+        index = _read_pts(tokens, index, expr)
 
+    stack: list[Expr] = []  # the parents of expr which are still being read
+    while index < n_tokens:
+        token = tokens[index]
+        index += 1
+
+        if token == "(":
+            if index == n_tokens:
+                break
+            typ = sys.intern(tokens[index])
+            index += 1
+            sub_expr = _make_expr(typ, expr.name, stack[-1].name if stack else parent)
+            stack.append(expr)
+            expr = sub_expr
+            if isinstance(expr, Pts):
+                index = _read_pts(tokens, index, expr)
+        elif token == ")":
+            if not stack:
+                return (index, expr)
+            sub_expr = expr
+            expr = stack.pop()
+            # nodes being read have no attribute index yet, skip Expr.append
+            expr.data.append(sub_expr)
+        else:
+            expr.data.append(_atom(token))
 
+    raise SyntaxError("unexpected EOF")
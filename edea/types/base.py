@@ -4,9 +4,12 @@ s-expression related dataclasses.
 
 SPDX-License-Identifier: EUPL-1.2
 """
-from typing import Type, Union, get_origin
+import dataclasses
+from enum import Enum
+from typing import Callable, Literal, Type, Union, get_args, get_origin, get_type_hints
 
 from pydantic import ValidationError
+from pydantic.fields import ModelField
 from pydantic.color import Color
 from pydantic.dataclasses import dataclass
 
@@ -14,7 +17,26 @@ from edea.types.config import PydanticConfig
 from edea.util import to_snake_case
 
 
+# our dataclasses by their tag name, in the order they are defined. classes
+# that share a tag name are tried in that order when parsing.
+TAG_MAP: dict[str, list[Type["KicadExpr"]]] = {}
+
+
 class KicadExpr:
+    # no __dict__ of our own so subclasses can be slotted dataclasses
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        classes = TAG_MAP.setdefault(cls.kicad_expr_tag_name, [])
+        for i, registered in enumerate(classes):
+            # `dataclass(slots=True)` replaces the class it decorates
+            same_name = registered.__qualname__ == cls.__qualname__
+            if same_name and registered.__module__ == cls.__module__:
+                classes[i] = cls
+                return
+        classes.append(cls)
+
     @classmethod
     @property
     def kicad_expr_tag_name(cls):
@@ -32,82 +54,358 @@ class KicadExpr:
         you omit the tag name in the s-expression so e.g. for
         `(symbol "foo" (pin 1))` you would pass `["foo", ["pin", 1]]` to this method.
         """
-        parsed_args, parsed_kwargs = _get_args(expr)
-        fields: dict[str, ModelField] = cls.__pydantic_model__.__fields__
+        # look in our own __dict__ so subclasses don't pick up their parent's function
+        fast_from_list = cls.__dict__.get("_fast_from_list")
+        if fast_from_list is None:
+            fast_from_list = cls._compile_from_list()
+            cls._fast_from_list = fast_from_list
+        return fast_from_list(cls, expr)
+
+    @classmethod
+    def __get_validators__(cls):
+        """
+        Pydantic can't validate the plain (slotted) dataclasses we use for
+        the most numerous expressions, they are only ever built through
+        `from_list` or by hand, so we just check the type. Pydantic
+        dataclasses override this with their own validators.
+        """
+        yield cls._validate_instance
+
+    @classmethod
+    def _validate_instance(cls, value):
+        if not isinstance(value, cls):
+            raise TypeError(f"Expecting {cls.__name__} but got {type(value).__name__}")
+        return value
+
+    @classmethod
+    def _dispatch(cls) -> dict[str, tuple[int, type, object]]:
+        """
+        The dispatch table for our fields, built on first use and cached on
+        the class. See `_build_dispatch`.
+        """
+        # look in our own __dict__ so subclasses don't pick up their parent's table
+        dispatch = cls.__dict__.get("_edea_dispatch")
+        if dispatch is None:
+            dispatch = _build_dispatch(cls)
+            cls._edea_dispatch = dispatch
+        return dispatch
+
+    @classmethod
+    def _compile_from_list(cls) -> Callable:
+        """
+        Generate a `from_list` function specialized for this class. What to do
+        with a field only depends on its type, so we emit straight-line code
+        with one branch per field name from our dispatch table instead of
+        repeating the same type checks for every expression we parse.
+        """
+        namespace = {
+            "_get_args": _get_args,
+            "_from_union": _from_union,
+            "_to_tuple": _to_tuple,
+            "_convert_args": _convert_args,
+            "Color": Color,
+        }
+        # pydantic dataclasses convert the strings we give them, for plain
+        # dataclasses we need to do it ourselves
+        validated = _is_pydantic_dataclass(cls)
+        lines = [
+            "def from_list(cls, expr):",
+            "    parsed_args, parsed_kwargs = _get_args(expr)",
+        ]
 
-        # this is a bit hacky. we instantiate a schematic with just the version
-        # because we want to validate the file format version before anything else.
+        # this is a bit hacky. we validate just the version of a schematic
+        # because we want to check the file format version before anything else.
         # what's a better way to do this? maybe make `from_list` lazy?
-        if cls.kicad_expr_tag_name == "kicad_sch" and "version" in parsed_kwargs:
-            cls(version=parsed_kwargs["version"][0][0])
-
-        kwargs = {}
-        for kw in parsed_kwargs:
-            field_type = fields[kw].type_
-            field_type_outer = get_origin(fields[kw].outer_type_)
-            exp = parsed_kwargs[kw]
-
-            if is_kicad_expr(field_type):
-                # if our type says it's a list we give it the args as a list
-                if field_type_outer is list:
-                    kwargs[kw] = [field_type.from_list(e) for e in exp]
-                else:
-                    if len(exp) != 1:
-                        raise SyntaxError(
-                            f"Expecting only one item but got {len(exp)}: {exp}"
-                        )
-                    kwargs[kw] = field_type.from_list(exp[0])
+        if cls.kicad_expr_tag_name == "kicad_sch":
+            namespace["_validate_field"] = _validate_field
+            lines += [
+                '    if "version" in parsed_kwargs:',
+                '        _validate_field(cls, "version", parsed_kwargs["version"][0][0])',
+            ]
+
+        lines += [
+            "    kwargs = {}",
+            "    for kw, exp in parsed_kwargs.items():",
+        ]
+        check_one = [
+            "            if len(exp) != 1:",
+            '                raise SyntaxError(f"Expecting only one item but got {len(exp)}: {exp}")',
+        ]
+
+        branch = "if"
+        for i, (name, (kind, field_type, extra)) in enumerate(cls._dispatch().items()):
+            type_name = f"_type_{i}"
+            # `bool("no")` is True, parse it the way pydantic would
+            namespace[type_name] = _to_bool if field_type is bool and not validated else field_type
+
+            lines.append(f"        {branch} kw == {name!r}:")
+            branch = "elif"
+
+            if kind == _KIND_EXPR_LIST:
+                lines.append(f"            kwargs[kw] = [{type_name}.from_list(e) for e in exp]")
+                continue
+
+            lines += check_one
+            if kind == _KIND_EXPR:
+                lines.append(f"            kwargs[kw] = {type_name}.from_list(exp[0])")
+            elif kind == _KIND_TUPLE and validated:
+                lines.append("            kwargs[kw] = tuple(exp[0])")
+            elif kind == _KIND_TUPLE:
+                lines.append(f"            kwargs[kw] = _to_tuple(exp[0], {type_name})")
+            elif kind == _KIND_LIST:
+                lines.append("            kwargs[kw] = list(exp[0])")
+            elif kind == _KIND_COLOR:
+                lines.append("            kwargs[kw] = Color(exp[0])")
+            elif kind == _KIND_UNION:
+                extra_name = f"_union_{i}"
+                namespace[extra_name] = extra
+                lines.append(f"            kwargs[kw] = _from_union(exp[0], *{extra_name})")
             else:
-                if len(exp) != 1:
-                    raise SyntaxError(
-                        f"Expecting only one item but got {len(exp)}: {exp}"
-                    )
-                # if it's not one of our dataclasses most often we just want to pass
-                # the first and only item to `field_type` but sometimes we want to
-                # make a tuple or something similar from the list of args
-                # e.g. `["start", 1.0, 1.0]` -> `{"start": tuple([1.0, 1.0])}`
-                if field_type_outer is tuple:
-                    kwargs[kw] = tuple(exp[0])
-                elif field_type_outer is list:
-                    kwargs[kw] = list(exp[0])
-                elif field_type is Color:
-                    kwargs[kw] = Color(exp[0])
-
-                # union types are tried till we find one that doesn't produce a validation error
-                # XXX this does not yet support unions that include `tuple`, `list` or `Color`
-                elif field_type_outer is Union:
-                    errors = []
-                    for sub_field in fields[kw].sub_fields:
-                        try:
-                            # would be nice to not repeat logic from above here
-                            sft = sub_field.type_
-                            if is_kicad_expr(sft):
-                                kwargs[kw] = sft.from_list(exp[0])
-                            else:
-                                kwargs[kw] = sft(*exp[0])
-                        except (ValidationError, TypeError) as e:
-                            errors.append(e)
-                        else:
-                            break
-                    if kw not in kwargs:
-                        raise errors[0]
-
-                else:
-                    # we do actually support multiple args by using `*exp[0]` but
-                    # do we gain anything by allowing it?
-                    if len(exp[0]) != 1:
-                        raise SyntaxError(
-                            f"Expecting only one item but got {len(exp[0])}: {exp[0]}"
-                        )
-                    kwargs[kw] = field_type(*exp[0])
-
-        return cls(*parsed_args, **kwargs)
+                # we do actually support multiple args by using `*exp[0]` but
+                # do we gain anything by allowing it?
+                lines += [
+                    "            if len(exp[0]) != 1:",
+                    '                raise SyntaxError(f"Expecting only one item but got {len(exp[0])}: {exp[0]}")',
+                    f"            kwargs[kw] = {type_name}(*exp[0])",
+                ]
+
+        # unknown keywords raise a KeyError just like looking them up in the fields would
+        if branch == "if":
+            lines.append("        raise KeyError(kw)")
+        else:
+            lines += ["        else:", "            raise KeyError(kw)"]
+        if validated:
+            lines.append("    return cls(*parsed_args, **kwargs)")
+        else:
+            arg_types = [
+                field_type if kind == _KIND_SCALAR else None
+                for kind, field_type, _ in cls._dispatch().values()
+            ]
+            namespace["_arg_types"] = arg_types
+            # convert the positional args inline for the usual counts, e.g.
+            # `cls(_type_0(parsed_args[0]), _type_1(parsed_args[1]), **kwargs)`
+            # for `(xy 1.27 2.54)`, so numeric leaves are converted exactly once
+            lines.append("    n_args = len(parsed_args)")
+            for count in range(len(arg_types) + 1):
+                if count > 0 and arg_types[count - 1] is None:
+                    break
+                converted = "".join(
+                    f"_type_{i}(parsed_args[{i}]), " for i in range(count)
+                )
+                lines += [
+                    f"    if n_args == {count}:",
+                    f"        return cls({converted}**kwargs)",
+                ]
+            lines.append("    return cls(*_convert_args(parsed_args, _arg_types), **kwargs)")
+
+        # the source is built only from our own class and field names (the latter as repr() string literals),
+        # generated variable names and counts, nothing in it comes from a parsed file
+        source = "\n".join(lines)
+        exec(compile(source, f"<from_list {cls.__name__}>", "exec"), namespace)  # nosec B102
+        return namespace["from_list"]
+
+
+# the ways in which `from_list` turns the arguments of a keyword into a field value
+_KIND_EXPR_LIST = 0  # list of our dataclasses, one per occurrence of the keyword
+_KIND_EXPR = 1  # one of our dataclasses
+_KIND_TUPLE = 2  # e.g. `["start", 1.0, 1.0]` -> `{"start": tuple([1.0, 1.0])}`
+_KIND_LIST = 3
+_KIND_COLOR = 4
+_KIND_UNION = 5
+_KIND_SCALAR = 6  # `field_type(arg)` with exactly one argument
+
+
+def _build_dispatch(cls) -> dict[str, tuple[int, type, object]]:
+    """
+    Inspect the fields of a dataclass once and map each keyword to a
+    `(kind, field_type, extra)` tuple, where kind is one of the `_KIND_*`
+    constants above. For unions extra holds the field and its discriminator.
+    """
+    dispatch = {}
+    for name, field_type, field_type_outer, field in _field_types(cls):
+        extra = None
+
+        if is_kicad_expr(field_type):
+            # if our type says it's a list we give it the args as a list
+            kind = _KIND_EXPR_LIST if field_type_outer is list else _KIND_EXPR
+        # if it's not one of our dataclasses most often we just want to pass
+        # the first and only item to `field_type` but sometimes we want to
+        # make a tuple or something similar from the list of args
+        elif field_type_outer is tuple:
+            kind = _KIND_TUPLE
+            field_type = get_args(field_type)
+        elif field_type_outer is list:
+            kind = _KIND_LIST
+        elif field_type is Color:
+            kind = _KIND_COLOR
+        elif field_type_outer is Union:
+            if field is None:
+                raise NotImplementedError(
+                    f"Union fields need a pydantic dataclass: {cls.__name__}.{name}"
+                )
+            kind = _KIND_UNION
+            extra = (field, _union_discriminator(field))
+        else:
+            kind = _KIND_SCALAR
+
+        dispatch[name] = (kind, field_type, extra)
+    return dispatch
+
+
+def _is_pydantic_dataclass(cls) -> bool:
+    return "__pydantic_model__" in cls.__dict__
+
+
+def _field_types(cls) -> list[tuple[str, type, object, ModelField | None]]:
+    """
+    List `(name, field_type, outer_origin, pydantic_field)` for the fields of
+    one of our dataclasses. For pydantic dataclasses the types come from
+    pydantic, for plain dataclasses we unwrap `Optional[...]` and `list[...]`
+    the same way pydantic does and there is no pydantic field.
+    """
+    if _is_pydantic_dataclass(cls):
+        return [
+            (name, field.type_, get_origin(field.outer_type_), field)
+            for name, field in cls.__pydantic_model__.__fields__.items()
+        ]
+
+    hints = get_type_hints(cls)
+    result = []
+    for f in dataclasses.fields(cls):
+        field_type = hints[f.name]
+        type_args = get_args(field_type)
+        if get_origin(field_type) is Union and len(type_args) == 2 and type(None) in type_args:
+            field_type = type_args[0] if type_args[1] is type(None) else type_args[1]
+        outer = get_origin(field_type)
+        if outer is list:
+            field_type = get_args(field_type)[0]
+        result.append((f.name, field_type, outer, None))
+    return result
 
 
 def is_kicad_expr(t):
     return isinstance(t, type) and issubclass(t, KicadExpr)
 
 
+def _union_discriminator(field: ModelField) -> dict:
+    """
+    Map the possible values of the first argument to the types of the union
+    worth trying for them, e.g. `{"User": (PaperUser,), "A4": (Paper,), ...}`
+    for paper. The first field of a member which is a `Literal` or an `Enum`
+    tells us which values it can take, members which can't take the value are
+    left out. Members we can't tell anything about are kept in their original
+    position, so the same type wins as when trying them all in order.
+    """
+    members = []
+    for sub_field in field.sub_fields:
+        sft = sub_field.type_
+        members.append((sft, _first_arg_values(sft)))
+
+    discriminator = {}
+    for _, values in members:
+        for value in values or ():
+            if value not in discriminator:
+                discriminator[value] = tuple(
+                    sft for sft, member_values in members if member_values is None or value in member_values
+                )
+    return discriminator
+
+
+def _first_arg_values(sft) -> frozenset | None:
+    """
+    The values the first argument of one of our dataclasses can take, `None`
+    if we can't tell.
+    """
+    # plain dataclasses don't validate their fields, they would take any value
+    if not is_kicad_expr(sft) or not _is_pydantic_dataclass(sft):
+        return None
+    sub_fields = _field_types(sft)
+    if len(sub_fields) == 0:
+        return None
+    _, first_type, _, _ = sub_fields[0]
+    if get_origin(first_type) is Literal:
+        return frozenset(get_args(first_type))
+    if isinstance(first_type, type) and issubclass(first_type, Enum):
+        return frozenset(member.value for member in first_type)
+    return None
+
+
+def _validate_field(cls, name: str, value):
+    """
+    Run pydantic's validation for a single field of a pydantic dataclass,
+    without constructing the dataclass and all its defaults.
+    """
+    model = cls.__pydantic_model__
+    _, errors = model.__fields__[name].validate(value, {}, loc=name, cls=model)
+    if errors:
+        raise ValidationError([errors], model)
+
+
+def _from_union(args: list, field: ModelField, discriminator: dict) -> "KicadExpr":
+    """
+    Union types are tried till we find one that doesn't produce a validation
+    error. If the first argument is in the discriminator we only try the
+    types which can take it, see `_union_discriminator`.
+    XXX this does not yet support unions that include `tuple`, `list` or `Color`
+    """
+    candidates = None
+    if len(args) > 0 and not isinstance(args[0], list):
+        candidates = discriminator.get(args[0])
+    if candidates is None:
+        candidates = [sub_field.type_ for sub_field in field.sub_fields]
+
+    # only the first error is ever raised so there's no need to collect them all
+    first_error = None
+    for sft in candidates:
+        try:
+            if is_kicad_expr(sft):
+                return sft.from_list(args)
+            return sft(*args)
+        except (ValidationError, TypeError) as e:
+            if first_error is None:
+                first_error = e
+    raise first_error
+
+
+_TRUE_VALUES = {True, 1, "1", "on", "t", "true", "y", "yes"}
+_FALSE_VALUES = {False, 0, "0", "off", "f", "false", "n", "no"}
+
+
+def _to_bool(value) -> bool:
+    """
+    Convert a bool for a plain dataclass, accepting the same values as pydantic.
+    """
+    if isinstance(value, str):
+        value = value.lower()
+    if value in _TRUE_VALUES:
+        return True
+    if value in _FALSE_VALUES:
+        return False
+    raise ValueError(f"Expecting a boolean but got {value!r}")
+
+
+def _to_tuple(args: list, types: tuple) -> tuple:
+    """
+    Convert the args for a tuple field of a plain dataclass, e.g. `["1", "2"]`
+    with `(float, float)` becomes `(1.0, 2.0)`.
+    """
+    if len(args) != len(types):
+        raise TypeError(f"Expecting {len(types)} items but got {len(args)}: {args}")
+    return tuple(t(arg) for t, arg in zip(types, args))
+
+
+def _convert_args(args: list, types: list) -> list:
+    """
+    Convert the positional args for a plain dataclass, `None` in `types`
+    means we pass the arg on as is.
+    """
+    if len(args) > len(types):
+        raise TypeError(
+            f"Expecting at most {len(types)} positional args but got {len(args)}: {args}"
+        )
+    return [arg if t is None else t(arg) for t, arg in zip(types, args)]
+
+
 def _get_args(expr: list[list | str]) -> tuple[list[str], dict]:
     """
     Turn an s-expression list into something resembling python args and
@@ -124,24 +422,15 @@ def _get_args(expr: list[list | str]) -> tuple[list[str], dict]:
         index += 1
         args.append(arg)
 
-    kwarg_list = []
+    # collect the kwargs into lists as we go so duplicates end up together
+    # e.g. `[["pin", 1], ["pin", 2]]` becomes `{"pin": [[1], [2]]}`
+    kwargs = {}
     for kwarg in expr[index:]:
         if isinstance(kwarg, list):
-            kw = kwarg[0]
-            kwarg_list.append((kw, kwarg[1:]))
+            kwargs.setdefault(kwarg[0], []).append(kwarg[1:])
         else:
             # treat positional args after keyword args as booleans
             # e.g. instance of 'hide' becomes hide=True
-            kwarg_list.append((kwarg, [True]))
-
-    # Turn a list of kwargs into a kwarg dict collecting duplicates
-    # into lists.
-    # e.g. `[("pin", [1]), ("pin", [2])]` becomes `{"pin": [[1], [2]]}`
-    kwargs = {}
-    for kw, arg in kwarg_list:
-        if kw in kwargs:
-            kwargs[kw].append(arg)
-        else:
-            kwargs[kw] = [arg]
+            kwargs.setdefault(kwarg, []).append([True])
 
     return (args, kwargs)
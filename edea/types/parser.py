@@ -4,13 +4,12 @@ Methods for turning strings and lists into EDeA dataclasses.
 SPDX-License-Identifier: EUPL-1.2
 """
 import re
-from edea.types.base import KicadExpr
+import sys
 
-# we need to import this for get_all_subclasses to work
-import edea.types.schematic
-from edea.util import get_all_subclasses
+from edea.types.base import KicadExpr, TAG_MAP
 
-all_classes = get_all_subclasses(KicadExpr)
+# we need to import this so all our dataclasses are registered in `TAG_MAP`
+import edea.types.schematic
 
 
 def from_list(expr: list[str | list]) -> KicadExpr:
@@ -22,14 +21,13 @@ def from_list(expr: list[str | list]) -> KicadExpr:
     tag_name = expr[0]
     # pass the rest of the list to the first class where the tag name matches
     # and it doesn't throw an error
-    for cls in all_classes:
-        if tag_name == cls.kicad_expr_tag_name:
-            try:
-                result = cls.from_list(expr[1:])
-            except Exception as e:
-                errors.append(e)
-            else:
-                break
+    for cls in TAG_MAP.get(tag_name, ()):
+        try:
+            result = cls.from_list(expr[1:])
+        except Exception as e:
+            errors.append(e)
+        else:
+            break
     if result is None:
         if len(errors) >= 1:
             raise errors[0]
@@ -38,41 +36,87 @@ def from_list(expr: list[str | list]) -> KicadExpr:
     return result
 
 
-def _tokens_to_list(tokens: list, index: int = 0):
-    if len(tokens) == index:
-        raise SyntaxError("unexpected EOF")
-    token = tokens[index]
-    index += 1
+# the most common tokens first: atoms, then parentheses, then quoted strings.
+# a lone quote that doesn't start a complete string is a token by itself.
+_TOKENIZE_EXPR = re.compile(r'[^\s()"]+|[()]|"[^"\\]*(?:\\.[^"\\]*)*"|"')
+# complete quoted strings, the only tokens which need the regex
+_QUOTED_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+# unquoted atoms up to this length share one string object per parse, kicad
+# files repeat the same numbers and flags over and over again
+_SHARE_MAX_LEN = 16
+
+
+def from_str_to_list(text) -> list:
+    """
+    Turn a string containing KiCad s-expressions into nested lists.
 
-    if token == "(":
-        typ = tokens[index]
-        index += 1
+    Tokens are consumed as they are produced, so we never build a list of all
+    the tokens in the file. The unfinished lists are kept on an
+    explicit stack instead of recursing, so we don't pay for a function call
+    per expression and deeply nested files can't run into the recursion limit.
 
-        expr = [typ]
-        while tokens[index] != ")":
-            index, sub_expr = _tokens_to_list(tokens, index)
-            expr.append(sub_expr)
+    Expression names are interned and short atoms are deduplicated, which
+    saves memory and makes the keyword lookups in `from_list` cheaper.
+    """
+    tokens = _tokenize(text)
+    stack = []
+    current = None
+    shared = {}
 
-        # remove ')'
-        index += 1
+    for token in tokens:
+        first = token[0]
 
-        return (index, expr)
+        if first == "(":
+            tag = next(tokens, None)
+            if tag is None:
+                break
+            if current is not None:
+                stack.append(current)
+            current = [sys.intern(tag)]
+        elif first == ")":
+            if current is None:
+                raise SyntaxError("unexpected )")
+            if len(stack) == 0:
+                return current
+            parent = stack.pop()
+            parent.append(current)
+            current = parent
+        else:
+            if first == '"' and token[-1] == '"':
+                token = token[1:-1]
+            elif len(token) <= _SHARE_MAX_LEN:
+                token = shared.setdefault(token, token)
+            if current is None:
+                return token
+            current.append(token)
 
-    if token == ")":
-        raise SyntaxError("unexpected )")
+    raise SyntaxError("unexpected EOF")
 
-    if token.startswith('"') and token.endswith('"'):
-        token = token.strip('"')
-    return (index, token)
 
+def _tokenize(text):
+    """
+    Yield the same tokens as `_TOKENIZE_EXPR.finditer`, but faster.
 
-_TOKENIZE_EXPR = re.compile(r'("[^"\\]*(?:\\.[^"\\]*)*"|\(|\)|"|[^\s()"]+)')
+    Only the quoted strings are matched with the regex, the text in between is
+    split with the str methods which don't create a match object per token.
+    A lone quote can only be left over in between strings in a broken file,
+    those parts go through the regex.
+    """
+    start = 0
+    for match in _QUOTED_STRING.finditer(text):
+        yield from _split_unquoted(text[start:match.start()])
+        yield match[0]
+        start = match.end()
+    yield from _split_unquoted(text[start:])
 
 
-def from_str_to_list(text) -> list:
-    tokens = _TOKENIZE_EXPR.findall(text)
-    _, expr = _tokens_to_list(tokens, 0)
-    return expr
+def _split_unquoted(text) -> list:
+    """
+    Split text without complete quoted strings into tokens.
+    """
+    if '"' in text:
+        return _TOKENIZE_EXPR.findall(text)
+    return text.replace("(", " ( ").replace(")", " ) ").split()
 
 
 def from_str(text) -> KicadExpr:
@@ -3,9 +3,10 @@ Dataclasses describing the contents of .kicad_sch files.
 
 SPDX-License-Identifier: EUPL-1.2
 """
+import dataclasses
 from dataclasses import field
 from enum import Enum
-from typing import Optional, Literal, Union
+from typing import ClassVar, Optional, Literal, Union
 from uuid import UUID, uuid4
 
 from pydantic import validator
@@ -14,8 +15,15 @@ from pydantic.dataclasses import dataclass
 
 from edea.types.config import PydanticConfig
 from edea.types.base import KicadExpr
-from edea.types.schematic.shapes import Pts, Stroke, Fill
-from edea.types.schematic.symbol import Effects, Symbol, SymbolProperty
+from edea.types.schematic.shapes import DEFAULT_FILL, DEFAULT_STROKE, Pts, Stroke, Fill
+from edea.types.schematic.symbol import DEFAULT_EFFECTS, Effects, Symbol, SymbolProperty
+
+# shared default, Color isn't mutated after it's created
+_BLACK_TRANSPARENT = Color((0, 0, 0, 0))
+
+# list fields of our pydantic dataclasses default to a shared empty tuple.
+# pydantic validates defaults (`validate_all`) and turns it into a fresh
+# list for every instance, which is cheaper than `default_factory=list`.
 
 
 class PaperFormat(str, Enum):
@@ -54,12 +62,14 @@ class Paper(KicadExpr):
     orientation: PaperOrientation = PaperOrientation.LANDSCAPE
 
 
-@dataclass(config=PydanticConfig)
+# plain slotted dataclasses for the most numerous expressions, they are
+# only validated by `from_list`, see `KicadExpr.__get_validators__`
+@dataclasses.dataclass(slots=True)
 class PinAssignment(KicadExpr):
     number: str
     uuid: UUID = field(default_factory=uuid4)
     alternate: Optional[str] = None
-    kicad_expr_tag_name: Literal["pin"] = "pin"
+    kicad_expr_tag_name: ClassVar[str] = "pin"
 
 
 @dataclass(config=PydanticConfig)
@@ -89,28 +99,28 @@ class SymbolPlaced(KicadExpr):
     mirror: bool = False
     uuid: UUID = field(default_factory=uuid4)
     default_instance: Optional[DefaultInstance] = None
-    property: list[SymbolProperty] = field(default_factory=list)
-    pin: list[PinAssignment] = field(default_factory=list)
+    property: list[SymbolProperty] = ()
+    pin: list[PinAssignment] = ()
     fields_autoplaced: Optional[IsFieldsAutoplaced] = None
     kicad_expr_tag_name: Literal["symbol"] = "symbol"
 
 
-@dataclass(config=PydanticConfig)
+@dataclasses.dataclass(slots=True)
 class Wire(KicadExpr):
     pts: Pts = field(default_factory=Pts)
-    stroke: Stroke = field(default_factory=Stroke)
+    stroke: Stroke = DEFAULT_STROKE
     uuid: UUID = field(default_factory=uuid4)
 
 
-@dataclass(config=PydanticConfig)
+@dataclasses.dataclass(slots=True)
 class Junction(KicadExpr):
     at: tuple[float, float]
     diameter: float = 0
-    color: Color = Color((0, 0, 0, 0))
+    color: Color = _BLACK_TRANSPARENT
     uuid: UUID = field(default_factory=uuid4)
 
 
-@dataclass(config=PydanticConfig)
+@dataclasses.dataclass(slots=True)
 class NoConnect(KicadExpr):
     at: tuple[float, float]
     uuid: UUID = field(default_factory=uuid4)
@@ -121,7 +131,7 @@ class LocalLabel(KicadExpr):
     text: str
     at: tuple[float, float, float]
     fields_autoplaced: Optional[IsFieldsAutoplaced] = None
-    effects: Effects = field(default_factory=Effects)
+    effects: Effects = DEFAULT_EFFECTS
     uuid: UUID = field(default_factory=uuid4)
     kicad_expr_tag_name: Literal["label"] = "label"
 
@@ -139,9 +149,9 @@ class GlobalLabel(KicadExpr):
     text: str
     at: tuple[float, float, float]
     shape: LabelShape = LabelShape.BIDIRECTIONAL
-    effects: Effects = field(default_factory=Effects)
+    effects: Effects = DEFAULT_EFFECTS
     uuid: UUID = field(default_factory=uuid4)
-    property: list[SymbolProperty] = field(default_factory=list)
+    property: list[SymbolProperty] = ()
     fields_autoplaced: Optional[IsFieldsAutoplaced] = None
 
 
@@ -150,14 +160,14 @@ class HierarchicalLabel(KicadExpr):
     text: str
     at: tuple[float, float, float]
     shape: LabelShape = LabelShape.BIDIRECTIONAL
-    effects: Effects = field(default_factory=Effects)
+    effects: Effects = DEFAULT_EFFECTS
     uuid: UUID = field(default_factory=uuid4)
     fields_autoplaced: Optional[IsFieldsAutoplaced] = None
 
 
 @dataclass(config=PydanticConfig)
 class LibSymbols(KicadExpr):
-    symbol: list[Symbol] = field(default_factory=list)
+    symbol: list[Symbol] = ()
 
 
 @dataclass(config=PydanticConfig)
@@ -173,7 +183,7 @@ class TitleBlock(KicadExpr):
     date: str = ""
     rev: str = ""
     company: str = ""
-    comment: list[TitleBlockComment] = field(default_factory=list)
+    comment: list[TitleBlockComment] = ()
 
 
 @dataclass(config=PydanticConfig)
@@ -185,36 +195,37 @@ class SheetPath(KicadExpr):
 
 @dataclass(config=PydanticConfig)
 class SheetInstances(KicadExpr):
-    path: list[SheetPath] = field(default_factory=list)
+    path: list[SheetPath] = ()
 
 
-@dataclass(config=PydanticConfig)
+# there's one of these for every symbol in the project, see `PinAssignment`
+@dataclasses.dataclass(slots=True)
 class SymbolInstancesPath(KicadExpr):
     path: str
     reference: str
     unit: int
     value: str
     footprint: str = ""
-    kicad_expr_tag_name: Literal["path"] = "path"
+    kicad_expr_tag_name: ClassVar[str] = "path"
 
 
 @dataclass(config=PydanticConfig)
 class SymbolInstances(KicadExpr):
-    path: list[SymbolInstancesPath] = field(default_factory=list)
+    path: list[SymbolInstancesPath] = ()
 
 
 @dataclass(config=PydanticConfig)
 class PolyLineTopLevel(KicadExpr):
     pts: Pts = field(default_factory=Pts)
-    stroke: Stroke = field(default_factory=Stroke)
-    fill: Fill = field(default_factory=Fill)
+    stroke: Stroke = DEFAULT_STROKE
+    fill: Fill = DEFAULT_FILL
     uuid: UUID = field(default_factory=uuid4)
     kicad_expr_tag_name: Literal["polyline"] = "polyline"
 
 
 @dataclass(config=PydanticConfig)
 class FillColor(KicadExpr):
-    color: Color = Color((0, 0, 0, 0))
+    color: Color = _BLACK_TRANSPARENT
     kicad_expr_tag_name: Literal["fill"] = "fill"
 
 
@@ -223,7 +234,7 @@ class SheetPin(KicadExpr):
     name: str
     shape: LabelShape = LabelShape.BIDIRECTIONAL
     at: tuple[float, float, float] = (0, 0, 0)
-    effects: Effects = field(default_factory=Effects)
+    effects: Effects = DEFAULT_EFFECTS
     uuid: UUID = field(default_factory=uuid4)
     kicad_expr_tag_name: Literal["pin"] = "pin"
 
@@ -232,26 +243,26 @@ class SheetPin(KicadExpr):
 class Sheet(KicadExpr):
     at: tuple[float, float]
     size: tuple[float, float]
-    stroke: Stroke = field(default_factory=Stroke)
+    stroke: Stroke = DEFAULT_STROKE
     fill: FillColor = field(default_factory=FillColor)
     uuid: UUID = field(default_factory=uuid4)
-    property: list[SymbolProperty] = field(default_factory=list)
-    pin: list[SheetPin] = field(default_factory=list)
+    property: list[SymbolProperty] = ()
+    pin: list[SheetPin] = ()
     fields_autoplaced: Optional[IsFieldsAutoplaced] = None
 
 
-@dataclass(config=PydanticConfig)
+@dataclasses.dataclass(slots=True)
 class BusEntry(KicadExpr):
     at: tuple[float, float]
     size: tuple[float, float]
-    stroke: Stroke = field(default_factory=Stroke)
+    stroke: Stroke = DEFAULT_STROKE
     uuid: UUID = field(default_factory=uuid4)
 
 
 @dataclass(config=PydanticConfig)
 class Bus(KicadExpr):
     pts: Pts = field(default_factory=Pts)
-    stroke: Stroke = field(default_factory=Stroke)
+    stroke: Stroke = DEFAULT_STROKE
     uuid: UUID = field(default_factory=uuid4)
 
 
@@ -260,13 +271,13 @@ class Image(KicadExpr):
     at: tuple[float, float]
     scale: Optional[float] = None
     uuid: UUID = field(default_factory=uuid4)
-    data: list[str] = field(default_factory=list)
+    data: list[str] = ()
 
 
 @dataclass(config=PydanticConfig)
 class BusAlias(KicadExpr):
     name: str
-    members: list[str] = field(default_factory=list)
+    members: list[str] = ()
 
 
 @dataclass(config=PydanticConfig)
@@ -287,21 +298,21 @@ class Schematic(KicadExpr):
     title_block: Optional[TitleBlock] = None
     paper: Union[Paper, PaperUser] = field(default_factory=Paper)
     lib_symbols: LibSymbols = field(default_factory=LibSymbols)
-    sheet: list[Sheet] = field(default_factory=list)
-    symbol: list[SymbolPlaced] = field(default_factory=list)
-    polyline: list[PolyLineTopLevel] = field(default_factory=list)
-    wire: list[Wire] = field(default_factory=list)
-    bus: list[Bus] = field(default_factory=list)
-    image: list[Image] = field(default_factory=list)
-    junction: list[Junction] = field(default_factory=list)
-    no_connect: list[NoConnect] = field(default_factory=list)
-    bus_entry: list[BusEntry] = field(default_factory=list)
-    text: list[LocalLabel] = field(default_factory=list)
-    label: list[LocalLabel] = field(default_factory=list)
-    hierarchical_label: list[HierarchicalLabel] = field(default_factory=list)
-    global_label: list[GlobalLabel] = field(default_factory=list)
+    sheet: list[Sheet] = ()
+    symbol: list[SymbolPlaced] = ()
+    polyline: list[PolyLineTopLevel] = ()
+    wire: list[Wire] = ()
+    bus: list[Bus] = ()
+    image: list[Image] = ()
+    junction: list[Junction] = ()
+    no_connect: list[NoConnect] = ()
+    bus_entry: list[BusEntry] = ()
+    text: list[LocalLabel] = ()
+    label: list[LocalLabel] = ()
+    hierarchical_label: list[HierarchicalLabel] = ()
+    global_label: list[GlobalLabel] = ()
     sheet_instances: SheetInstances = field(default_factory=SheetInstances)
     symbol_instances: SymbolInstances = field(default_factory=SymbolInstances)
-    bus_alias: list[BusAlias] = field(default_factory=list)
+    bus_alias: list[BusAlias] = ()
 
     kicad_expr_tag_name: Literal["kicad_sch"] = "kicad_sch"
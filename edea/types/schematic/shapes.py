@@ -3,6 +3,8 @@ Dataclasses describing the graphic items found in .kicad_sch files.
 
 SPDX-License-Identifier: EUPL-1.2
 """
+import dataclasses
+from array import array
 from dataclasses import field
 from enum import Enum
 from typing import Optional
@@ -14,6 +16,10 @@ from edea.types.config import PydanticConfig
 from edea.types.base import KicadExpr
 
 
+# shared defaults, Color isn't mutated after it's created
+_BLACK_OPAQUE = Color((0, 0, 0, 1))
+
+
 class FillType(str, Enum):
     NONE = "none"
     OUTLINE = "outline"
@@ -29,57 +35,112 @@ class StrokeType(str, Enum):
     SOLID = "solid"
 
 
-@dataclass(config=PydanticConfig)
+# there are a lot of these, so they are plain slotted dataclasses which are
+# only validated by `from_list`, see `KicadExpr.__get_validators__`.
+# Stroke and Fill are frozen so every shape can share the same default.
+@dataclasses.dataclass(slots=True, frozen=True)
 class Stroke(KicadExpr):
     width: float = 0.1524
     type: StrokeType = StrokeType.DEFAULT
-    color: Color = Color((0, 0, 0, 1))
+    color: Color = _BLACK_OPAQUE
 
 
-@dataclass(config=PydanticConfig)
+@dataclasses.dataclass(slots=True, frozen=True)
 class Fill(KicadExpr):
     type: FillType = FillType.NONE
 
 
-@dataclass(config=PydanticConfig)
+DEFAULT_STROKE = Stroke()
+DEFAULT_FILL = Fill()
+
+
+@dataclasses.dataclass(slots=True)
 class XY(KicadExpr):
     x: float
     y: float
 
 
-@dataclass(config=PydanticConfig)
 class Pts(KicadExpr):
-    xy: list[XY] = field(default_factory=list)
+    """
+    A list of points, stored as two arrays of coordinates rather than an
+    `XY` object per point. `xy` builds the `XY` objects when asked for them.
+    """
+
+    __slots__ = ("_xs", "_ys")
+
+    def __init__(self, xy: list[XY] | None = None):
+        self._xs = array("d")
+        self._ys = array("d")
+        if xy is not None:
+            self.xy = xy
+
+    @property
+    def xy(self) -> list[XY]:
+        return [XY(x, y) for x, y in zip(self._xs, self._ys)]
+
+    @xy.setter
+    def xy(self, xy: list[XY]):
+        self._xs = array("d", (p.x for p in xy))
+        self._ys = array("d", (p.y for p in xy))
+
+    def __len__(self) -> int:
+        return len(self._xs)
+
+    def __repr__(self) -> str:
+        return f"Pts(xy={self.xy!r})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Pts):
+            return NotImplemented
+        return self._xs == other._xs and self._ys == other._ys
+
+    @classmethod
+    def from_list(cls, expr: list[list | str]) -> "Pts":
+        """
+        Read the `(xy x y)` expressions straight into our arrays, a polyline
+        can have hundreds of them so we skip going through `XY.from_list`.
+        """
+        pts = cls()
+        append_x = pts._xs.append
+        append_y = pts._ys.append
+        for e in expr:
+            if not isinstance(e, list) or e[0] != "xy":
+                raise KeyError(e if isinstance(e, str) else e[0])
+            if len(e) != 3:
+                raise TypeError(f"Expecting 2 coordinates but got {len(e) - 1}: {e[1:]}")
+            append_x(float(e[1]))
+            append_y(float(e[2]))
+        return pts
 
 
 @dataclass(config=PydanticConfig)
 class PolyLine(KicadExpr):
     pts: Pts = field(default_factory=Pts)
-    stroke: Stroke = field(default_factory=Stroke)
-    fill: Fill = field(default_factory=Fill)
+    stroke: Stroke = DEFAULT_STROKE
+    fill: Fill = DEFAULT_FILL
 
 
 @dataclass(config=PydanticConfig)
 class Bezier(KicadExpr):
     pts: Pts = field(default_factory=Pts)
-    stroke: Stroke = field(default_factory=Stroke)
-    fill: Fill = field(default_factory=Fill)
+    stroke: Stroke = DEFAULT_STROKE
+    fill: Fill = DEFAULT_FILL
 
 
 @dataclass(config=PydanticConfig)
 class Rectangle(KicadExpr):
     start: tuple[float, float]
     end: tuple[float, float]
-    stroke: Stroke = field(default_factory=Stroke)
-    fill: Fill = field(default_factory=Fill)
+    stroke: Stroke = DEFAULT_STROKE
+    fill: Fill = DEFAULT_FILL
 
 
 @dataclass(config=PydanticConfig)
 class Circle(KicadExpr):
     center: tuple[float, float]
     radius: float
-    stroke: Stroke = field(default_factory=Stroke)
-    fill: Fill = field(default_factory=Fill)
+    stroke: Stroke = DEFAULT_STROKE
+    fill: Fill = DEFAULT_FILL
 
 
 @dataclass(config=PydanticConfig)
@@ -95,5 +156,5 @@ class Arc(KicadExpr):
     end: tuple[float, float]
     mid: Optional[tuple[float, float]] = None
     radius: Optional[Radius] = None
-    stroke: Stroke = field(default_factory=Stroke)
-    fill: Fill = field(default_factory=Fill)
+    stroke: Stroke = DEFAULT_STROKE
+    fill: Fill = DEFAULT_FILL
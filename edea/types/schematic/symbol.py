@@ -4,6 +4,7 @@ Dataclasses describing the symbols found in "lib_symbols" of .kicad_sch files.
 SPDX-License-Identifier: EUPL-1.2
 """
 
+import dataclasses
 from dataclasses import field
 from enum import Enum
 from typing import Literal, Optional
@@ -28,7 +29,8 @@ class JustifyVert(str, Enum):
     BOTTOM = "bottom"
 
 
-@dataclass(config=PydanticConfig)
+# frozen so all texts can share the default, see `DEFAULT_EFFECTS`
+@dataclass(config=PydanticConfig, frozen=True)
 class Justify(KicadExpr):
     horizontal: JustifyHoriz = JustifyHoriz.CENTER
     vertical: JustifyVert = JustifyVert.CENTER
@@ -71,7 +73,13 @@ class PinGraphicStyle(str, Enum):
     NON_LOGIC = "non_logic"
 
 
-@dataclass(config=PydanticConfig)
+DEFAULT_JUSTIFY = Justify()
+
+
+# plain slotted dataclasses for the expressions every text has, they are
+# only validated by `from_list`, see `KicadExpr.__get_validators__`.
+# they are frozen so all texts can share the same defaults.
+@dataclasses.dataclass(slots=True, frozen=True)
 class Font(KicadExpr):
     size: tuple[float, float] = (1.27, 1.27)
     thickness: Optional[float] = None
@@ -79,24 +87,30 @@ class Font(KicadExpr):
     bold: bool = False
 
 
-@dataclass(config=PydanticConfig)
+DEFAULT_FONT = Font()
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
 class Effects(KicadExpr):
-    font: Font = field(default_factory=Font)
-    justify: Justify = field(default_factory=Justify)
+    font: Font = DEFAULT_FONT
+    justify: Justify = DEFAULT_JUSTIFY
     hide: bool = False
 
 
+DEFAULT_EFFECTS = Effects()
+
+
 @dataclass(config=PydanticConfig)
 class PinNumber(KicadExpr):
     text: str = ""
-    effects: Effects = field(default_factory=Effects)
+    effects: Effects = DEFAULT_EFFECTS
     kicad_expr_tag_name: Literal["number"] = "number"
 
 
 @dataclass(config=PydanticConfig)
 class PinName(KicadExpr):
     text: str = ""
-    effects: Effects = field(default_factory=Effects)
+    effects: Effects = DEFAULT_EFFECTS
     kicad_expr_tag_name: Literal["name"] = "name"
 
 
@@ -106,7 +120,7 @@ class SymbolProperty(KicadExpr):
     value: str = ""
     id: int = 0
     at: tuple[float, float, float] = (0, 0, 0)
-    effects: Effects = field(default_factory=Effects)
+    effects: Effects = DEFAULT_EFFECTS
     kicad_expr_tag_name: Literal["property"] = "property"
 
 
@@ -169,7 +183,7 @@ class PinNumberSettings(KicadExpr):
 class SymbolGraphicText(KicadExpr):
     text: str
     at: tuple[float, float, float]
-    effects: Effects = field(default_factory=Effects)
+    effects: Effects = DEFAULT_EFFECTS
     kicad_expr_tag_name: Literal["text"] = "text"
 
 
@@ -5,23 +5,45 @@ SPDX-License-Identifier: EUPL-1.2
 """
 
 import re
+from functools import lru_cache
 
 # from https://stackoverflow.com/a/1176023
+_CAMEL_WORD = re.compile("(.)([A-Z][a-z]+)")
+_DOUBLE_UNDERSCORE = re.compile("__([A-Z])")
+_CAMEL_BOUNDARY = re.compile("([a-z0-9])([A-Z])")
+
+
+@lru_cache(maxsize=None)
 def to_snake_case(name):
     """
-    Converts from CamelCase to snake_case.
+    Converts from CamelCase to snake_case. We only ever convert class names
+    so the results are cached.
     """
-    name = re.sub("(.)([A-Z][a-z]+)", r"\1_\2", name)
-    name = re.sub("__([A-Z])", r"_\1", name)
-    name = re.sub("([a-z0-9])([A-Z])", r"\1_\2", name)
+    name = _CAMEL_WORD.sub(r"\1_\2", name)
+    name = _DOUBLE_UNDERSCORE.sub(r"_\1", name)
+    name = _CAMEL_BOUNDARY.sub(r"\1_\2", name)
     return name.lower()
 
 
 def get_all_subclasses(cls):
-    all_subclasses = []
+    """
+    All subclasses of cls, depth first. The result is cached, call
+    `clear_subclass_cache()` after defining new subclasses.
+    """
+    return list(_all_subclasses(cls))
+
 
-    for subclass in cls.__subclasses__():
+@lru_cache(maxsize=None)
+def _all_subclasses(cls) -> tuple:
+    all_subclasses = []
+    stack = list(reversed(cls.__subclasses__()))
+    while stack:
+        subclass = stack.pop()
         all_subclasses.append(subclass)
-        all_subclasses.extend(get_all_subclasses(subclass))
+        stack.extend(reversed(subclass.__subclasses__()))
+    return tuple(all_subclasses)
+
 
-    return all_subclasses
+def clear_subclass_cache():
+    """Forgets the cached results of `get_all_subclasses`."""
+    _all_subclasses.cache_clear()
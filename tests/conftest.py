@@ -0,0 +1,26 @@
+"""
+Shared test fixtures.
+
+SPDX-License-Identifier: EUPL-1.2
+"""
+from functools import lru_cache
+
+import pytest
+
+from edea.parser import Expr, from_str
+
+
+@pytest.fixture(scope="session")
+def load_expr():
+    """
+    Parse each test file only once per test session.
+
+    The parsed expressions are shared between tests, tests which modify them need to work on a clone().
+    """
+
+    @lru_cache(maxsize=None)
+    def load(path: str) -> Expr:
+        with open(path, encoding="utf-8") as f:
+            return from_str(f.read())
+
+    return load
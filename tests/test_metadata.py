@@ -6,6 +6,9 @@ This takes ferret, a fairly complex project and verifies some basic facts about
 SPDX-License-Identifier: EUPL-1.2
 """
 
+import os
+import pickle
+import shutil
 from time import time
 from tests.util import get_path_to_test_project
 
@@ -14,7 +17,7 @@ from edea.edea import Project
 test_projects = {
     "ferret": {
         "count_part": 134,
-        "count_unique": 115,
+        "count_unique": 80,
         "copper_layers": 4
     }
 }
@@ -34,3 +37,57 @@ class TestMetadata:
 
             for meta_key, expected_value in context.items():
                 assert metadata[meta_key] == expected_value
+
+    def test_metadata_from_cache(self, tmp_path):
+        path = get_path_to_test_project("ferret", "")
+
+        metadata = []
+        for _ in range(2):
+            # the first run fills the cache, the second one loads from it
+            pro = Project(path + "kicad_sch", path + "kicad_pcb", cache_dir=str(tmp_path))
+            pro.parse()
+            metadata.append(pro.metadata())
+
+        assert any(tmp_path.glob("*.pickle"))
+        assert metadata[0] == metadata[1]
+        assert metadata[1]["count_unique"] == test_projects["ferret"]["count_unique"]
+
+    def test_metadata_from_foreign_cache(self, tmp_path):
+        path = get_path_to_test_project("ferret", "")
+        pro = Project(path + "kicad_sch", path + "kicad_pcb", cache_dir=str(tmp_path))
+        pro.parse()
+        expected = pro.metadata()
+
+        # entries from another version of edea, or which aren't ours at all, are parsed again
+        foreign = [
+            b"cedea.gone\nExpr\n.",  # a module that doesn't exist anymore
+            b"cedea.parser\nGone\n.",  # a class that doesn't exist anymore
+            b"not a pickle",
+            pickle.dumps({"not": "an expression"}),
+        ]
+        for i, cache_file in enumerate(sorted(tmp_path.glob("*.pickle"))):
+            cache_file.write_bytes(foreign[i % len(foreign)])
+
+        pro = Project(path + "kicad_sch", path + "kicad_pcb", cache_dir=str(tmp_path))
+        pro.parse()
+        assert pro.metadata() == expected
+        assert not any(tmp_path.glob("*.tmp"))
+
+    def test_metadata_not_in_bom(self, tmp_path):
+        path = os.path.dirname(get_path_to_test_project("ferret"))
+        shutil.copytree(path, tmp_path, dirs_exist_ok=True)
+
+        # take one of the two mounting holes out of the BOM, the other one still counts for the unique parts
+        sch_file = tmp_path / "ferret.kicad_sch"
+        text = sch_file.read_text()
+        placed = '(at 35.56 176.53 0) (unit 1)\n    (in_bom yes)'
+        assert placed in text
+        sch_file.write_text(text.replace(placed, placed.replace("yes", "no")))
+
+        pro = Project(str(tmp_path / "ferret.kicad_sch"), str(tmp_path / "ferret.kicad_pcb"))
+        pro.parse()
+        metadata = pro.metadata()
+
+        assert metadata["count_part"] == test_projects["ferret"]["count_part"] - 1
+        assert metadata["count_unique"] == test_projects["ferret"]["count_unique"]
+        assert not any("H102" in part["Reference"] for part in metadata["parts"].values())
@@ -5,63 +5,75 @@ SPDX-License-Identifier: EUPL-1.2
 """
 
 import os
-import re
 import pytest
 
 from pydantic import ValidationError
 
-from edea.edea import Project, VersionError
+from edea.edea import MissingUUIDError, Project, VersionError
 from edea.types.parser import from_str
 from edea.types.schematic import Schematic
 
 test_folder = os.path.dirname(os.path.realpath(__file__))
 kicad_folder = os.path.join(test_folder, "kicad_projects/kicad6-test-files")
 
-kicad_pcb_files = []
-for root, dirs, files in os.walk(kicad_folder):
-    for file in files:
-        if file.endswith(".kicad_pcb"):
-            path = os.path.join(root, file)
-            kicad_pcb_files.append(path)
+kicad_pcb_files = {}
+kicad_sch_files = []
+
+
+def _collect_kicad_files(folder: str):
+    """
+    Walk the test folder once, sorting out the boards and schematics on the way.
+    """
+    with os.scandir(folder) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                _collect_kicad_files(entry.path)
+            elif entry.name.endswith(".kicad_pcb"):
+                kicad_pcb_files[entry.path[: -len(".kicad_pcb")]] = entry.path
+            elif entry.name.endswith(".kicad_sch"):
+                kicad_sch_files.append(entry.path)
+
 
+if os.path.isdir(kicad_folder):
+    _collect_kicad_files(kicad_folder)
+
+# pytest-xdist workers collect independently and need to agree on the order
+kicad_sch_files.sort()
+
+# the schematic doesn't have to exist, the test skips incomplete projects
 kicad_projects = [
-    (re.sub(r"\.kicad_pcb$", ".kicad_sch", pcb_path), pcb_path)
-    for pcb_path in kicad_pcb_files
+    (f"{stem}.kicad_sch", kicad_pcb_files[stem]) for stem in sorted(kicad_pcb_files)
 ]
 
 
-@pytest.mark.parametrize("kicad_file_pair", kicad_projects)
+def _test_id(path: str) -> str:
+    return os.path.relpath(path, kicad_folder)
+
+
+# why a project can't be parsed, for the errors which don't mean the parser is broken
+skip_reasons = {
+    VersionError: "old format",
+    FileNotFoundError: "incomplete project",
+    # some minimal files don't have a uuid, but they're not interesting anyway.
+    MissingUUIDError: "no uuid",
+    SyntaxError: "unmatched braces or a parser error",
+}
+
+
+@pytest.mark.parametrize(
+    "kicad_file_pair", kicad_projects, ids=[_test_id(pcb) for _, pcb in kicad_projects]
+)
 def test_parse_all(kicad_file_pair):
     sch_path, pcb_path = kicad_file_pair
     pro = Project(sch_path, pcb_path)
     try:
         pro.parse()
-    except VersionError as e:
-        print(f"skipping {sch_path} due to old format: {e}")
-    except FileNotFoundError as e:
-        print(f"project {sch_path} appears to be incomplete")
-    except AttributeError as e:
-        # some minimal files don't have a uuid, but they're not interesting anyway.
-        if "uuid" in str(e):
-            print(f"{sch_path} does not contain a uuid")
-        else:
-            raise e
-    except SyntaxError:
-        print(f"{sch_path} contains unmatched braces or there's a parser error")
-    except Exception as e:
-        print(f"failed to parse {sch_path}")
-        raise e
-
-
-kicad_sch_files = []
-for root, dirs, files in os.walk(kicad_folder):
-    for file in files:
-        if file.endswith(".kicad_sch"):
-            path = os.path.join(root, file)
-            kicad_sch_files.append(path)
+    except tuple(skip_reasons) as e:
+        reason = next(r for cls, r in skip_reasons.items() if isinstance(e, cls))
+        pytest.skip(f"skipping {sch_path}, {reason}: {e}")
 
 
-@pytest.mark.parametrize("sch_path", kicad_sch_files)
+@pytest.mark.parametrize("sch_path", kicad_sch_files, ids=_test_id)
 def test_parse_all_types(sch_path):
     with open(sch_path, encoding="utf-8") as f:
         try:
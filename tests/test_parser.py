@@ -0,0 +1,97 @@
+"""
+KiCad s-expression parser tests
+
+SPDX-License-Identifier: EUPL-1.2
+"""
+
+from copy import copy, deepcopy
+import pickle
+
+import pytest
+
+from edea.parser import from_str
+
+
+class TestParser:
+    def test_pts_roundtrip(self):
+        # integral floats are kept as they were written, whether the points are packed or not
+        text = "(gr_poly (pts (xy 1.0 2.0) (xy 1 2) (xy 1.5 -0.25)))"
+        expr = from_str(text)
+
+        assert str(expr) == "\n(gr_poly \n(pts \n(xy 1.0 2.0) \n(xy 1 2) \n(xy 1.5 -0.25)))"
+        assert str(from_str(str(expr))) == str(expr)
+
+        text = "(gr_poly (pts (xy 1 2) (xy 1.5 -0.25) (xy 1e3 3.0)))"
+        assert str(from_str(text)) == "\n(gr_poly \n(pts \n(xy 1 2) \n(xy 1.5 -0.25) \n(xy 1000.0 3.0)))"
+
+    @pytest.mark.parametrize(
+        "text", ["(", "(a", "(a (", "(a (b", "(a (b c)", "(gr_poly (pts (xy 1 2", "(gr_poly (pts (xy 1 2) (xy 3 4"]
+    )
+    def test_truncated(self, text):
+        with pytest.raises(SyntaxError, match="unexpected EOF"):
+            from_str(text)
+
+    def test_malformed_pts(self):
+        # points which can't be packed are kept as they are
+        text = "(gr_poly (pts (xy 1 2) (xy 3 x) (xy 5) (xy 6 7)))"
+        expected = "\n(gr_poly \n(pts \n(xy 1 2) \n(xy 3 x) \n(xy 5) \n(xy 6 7)))"
+        assert str(from_str(text)) == expected
+
+    def test_copy_after_attribute_access(self):
+        expr = from_str("(a (b 1) (c 2))")
+        assert expr.b[0] == 1
+
+        copied = deepcopy(expr)
+        assert copied.b is copied.data[0]
+        copied.b.data[0] = 99
+        assert str(copied) == "\n(a \n(b 99) \n(c 2))"
+        assert str(expr) == "\n(a \n(b 1) \n(c 2))"
+
+    def test_index_after_copy(self):
+        expr = from_str("(a (b 1) (c 2))")
+        assert expr.c[0] == 2
+
+        # the copy shares the children but has its own list, changing it must not leave a stale index behind
+        copied = copy(expr)
+        copied.data[1] = from_str("(d 3)")
+        assert copied.d[0] == 3
+        assert not hasattr(copied, "c")
+        assert expr.c[0] == 2
+
+        copied = pickle.loads(pickle.dumps(expr))
+        assert copied.c is copied.data[1]
+
+    def test_pts_access(self):
+        pts = from_str("(pts (xy 1 2) (xy 3.5 4) (xy 5 6))")
+
+        assert len(pts) == 3
+        assert [str(point) for point in pts] == ["\n(xy 1 2)", "\n(xy 3.5 4)", "\n(xy 5 6)"]
+        assert pts[1].data == [3.5, 4]
+
+    def test_pts_move(self):
+        pts = from_str("(gr_poly (pts (xy 1 2) (xy 3.5 4)))").pts
+        pts.move_xy(2, 1)
+        assert str(pts) == "\n(pts \n(xy 3 3) \n(xy 5.5 5))"
+
+        # like everywhere else, moving by a float turns integral coordinates into floats
+        pts = from_str("(gr_poly (pts (xy 142.5 100) (xy 3 4)))").pts
+        pts.move_xy(3.5, -2.25)
+        assert str(pts) == "\n(pts \n(xy 146.0 97.75) \n(xy 6.5 1.75))"
+
+    def test_polygon_corners(self):
+        # the packed points and the ones after them both count
+        zone = from_str("(zone (polygon (pts (xy 100 100) (xy 200 300) (xy 1.0 2.0))))")
+        assert zone.polygon.corners().tolist() == [[1, 2], [1, 300], [200, 300], [200, 2]]
+
+        zone = from_str("(zone (polygon (pts (xy 100 100) (xy 5 x) (xy 0 -10))))")
+        with pytest.raises(ValueError):
+            zone.polygon.corners()
+
+    def test_pad_corners(self):
+        pad = from_str('(footprint (pad "1" smd rect (at 1 2) (size 2 1)))').data[0]
+        corners = pad.corners()
+        assert corners.tolist() == [[2, 2.5], [2, 1.5], [0, 2.5], [0, 1.5]]
+
+        # the cached corners stay as they were when the returned ones are changed
+        corners += 1
+        assert pad.corners().tolist() == [[2, 2.5], [2, 1.5], [0, 2.5], [0, 1.5]]
@@ -14,31 +14,48 @@ from tests.util import get_path_to_test_project
 test_projects = {
     "ferret": {
         "count_part": 134,
-        "count_unique": 115,
+        "count_unique": 80,
         "area": 26205.075
     }
 }
 
 
 class TestPCB:
-    def test_boundingbox(self):
+    def test_boundingbox(self, load_expr):
         for proj_name, context in test_projects.items():
             file_name = get_path_to_test_project(proj_name, "kicad_pcb")
-            with open(file_name, encoding="utf-8") as f:
-                contents = f.read()
-            pcb = PCB(from_str(contents), proj_name, file_name)
+            pcb = PCB(load_expr(file_name), proj_name, file_name)
 
             bb = pcb.bounding_box()
 
             assert bb.area == context["area"]
 
-    def test_merge_pcb(self):
+    def test_boundingbox_cache(self):
+        # a board with only a zone, its polygon has absolute coordinates so moving the board moves the box
+        text = "(kicad_pcb (zone (net 0) (polygon (pts (xy 100 50) (xy 120 50) (xy 120 80.5) (xy 100 80.5)))))"
+        pcb = PCB(from_str(text), "zone", "zone.kicad_pcb")
+
+        bb = pcb.bounding_box()
+        before = (bb.min_x, bb.min_y, bb.max_x, bb.max_y)
+        assert before == (100, 50, 120, 80.5)
+
+        # changing the returned box must not change the cached one
+        bb.translate((5.0, 5.0))
+        bb = pcb.bounding_box()
+        assert (bb.min_x, bb.min_y, bb.max_x, bb.max_y) == before
+
+        # the cached box must not outlive a move
+        pcb.move(10.0, 10.0)
+        bb = pcb.bounding_box()
+        assert (bb.min_x, bb.min_y, bb.max_x, bb.max_y) == (110, 60, 130, 90.5)
+
+    def test_merge_pcb(self, load_expr):
         file_name = get_path_to_test_project("3v3ldo", "kicad_pcb")
-        with open(file_name, encoding="utf-8") as f:
-            contents = f.read()
-        pcb = PCB(from_str(contents), "3v3ldo", file_name)
-        pcb2 = PCB(from_str(contents), "3v3ldo", file_name)
-        pcb3 = PCB(from_str(contents), "3v3ldo", file_name)
+        # merging modifies all of the PCBs, so each one gets its own copy
+        expr = load_expr(file_name)
+        pcb = PCB(expr.clone(), "3v3ldo", file_name)
+        pcb2 = PCB(expr.clone(), "3v3ldo", file_name)
+        pcb3 = PCB(expr.clone(), "3v3ldo", file_name)
 
         pcb.append([(str(uuid4()), pcb2), (str(uuid4()), pcb3)])
 
@@ -4,57 +4,63 @@ SVG Rendering tests
 SPDX-License-Identifier: EUPL-1.2
 """
 
+import re
+from collections import Counter
+
+import pytest
+
 from edea.parser import from_str
 from edea.edea import Schematic
 
+# kicad flips the y axis inside symbols, we undo this when we draw rects.
+# rects are only ever inside symbols, never on the top level in schematics
+draw_cases = {
+    "rect": (
+        "(rectangle (start -5.08 5.08) (end 5.08 -1.905))",
+        (0, 0),
+        '<rect x="-5.08" y="-5.08" width="10.16" height="6.985" />',
+    ),
+    "rect_stroke": (
+        "(rectangle (start -5.08 5.08) (end 5.08 -1.905) (stroke (width 0.254) (type default) (color 120 85 0 0.5)) (fill (type background))))",
+        (20, 10),
+        '<rect stroke="rgb(120,85,0)" stroke-opacity="0.5" stroke-width="0.254" fill="none" x="14.92" y="4.92" width="10.16" height="6.985" />',
+    ),
+    "polyline": (
+        "(polyline (pts (xy -1.524 0.508) (xy 1.524 0.508)) (stroke (width 0.3048) (type default) (color 0 0 0 0)) (fill (type none)))",
+        (0, 0),
+        '<polyline stroke="rgb(0,0,0)" stroke-opacity="1" stroke-width="0.3048" fill="none" points="-1.524,0.508 1.524,0.508" />',
+    ),
+    "polyline_outline": (
+        "(polyline (pts (xy -1.524 0.508) (xy 1.524 0.508)) (stroke (width 0.3048) (type default) (color 0 50 0 0.2)) (fill (type outline)))",
+        (12, 0),
+        '<polyline stroke="rgb(0,50,0)" stroke-opacity="0.2" stroke-width="0.3048" fill="rgb(0,50,0)" fill-opacity="0.2" points="10.476,0.508 13.524,0.508" />',
+    ),
+}
+
 
 class TestRendering:
-    def test_draw_rect(self):
-        expr = from_str("(rectangle (start -5.08 5.08) (end 5.08 -1.905))")
-
-        # kicad flips the y axis inside symbols, we undo this when we draw
-        # rects. rects are only ever inside symbols, never on the top level in
-        # schematics
-        assert (
-            expr.draw((0, 0))
-            == '<rect x="-5.08" y="-5.08" width="10.16" height="6.985" />'
-        )
-
-    def test_draw_rect_stroke(self):
-        expr = from_str(
-            "(rectangle (start -5.08 5.08) (end 5.08 -1.905) (stroke (width 0.254) (type default) (color 120 85 0 0.5)) (fill (type background))))"
-        )
-
-        assert (
-            expr.draw((20, 10))
-            == '<rect stroke="rgb(120,85,0)" stroke-opacity="0.5" stroke-width="0.254" fill="none" x="14.92" y="4.92" width="10.16" height="6.985" />'
-        )
-    def test_draw_polyline(self):
-        expr = from_str(
-            "(polyline (pts (xy -1.524 0.508) (xy 1.524 0.508)) (stroke (width 0.3048) (type default) (color 0 0 0 0)) (fill (type none)))"
-        )
-
-        assert (
-            expr.draw((0, 0))
-            == '<polyline stroke="rgb(0,0,0)" stroke-opacity="1" stroke-width="0.3048" fill="none" points="-1.524,0.508 1.524,0.508" />'
-        )
-    def test_draw_polyline_outline(self):
-        expr = from_str(
-            "(polyline (pts (xy -1.524 0.508) (xy 1.524 0.508)) (stroke (width 0.3048) (type default) (color 0 50 0 0.2)) (fill (type outline)))"
-        )
-
-        assert (
-            expr.draw((12, 0))
-            == '<polyline stroke="rgb(0,50,0)" stroke-opacity="0.2" stroke-width="0.3048" fill="rgb(0,50,0)" fill-opacity="0.2" points="10.476,0.508 13.524,0.508" />'
-        )
-    # def test_draw_pin(self):
-
-    def test_draw_symbol(self):
-        with open(
-            "tests/kicad_projects/ferret/control.kicad_sch", encoding="utf-8"
-        ) as f:
-            sch = Schematic(from_str(f.read()), "3v3ldo", "")
+    @pytest.mark.parametrize(
+        "sexp,origin,expected", draw_cases.values(), ids=draw_cases.keys()
+    )
+    def test_draw(self, sexp, origin, expected):
+        assert from_str(sexp).draw(origin) == expected
+
+    def test_draw_symbol(self, load_expr, tmp_path):
+        sch = Schematic(load_expr("tests/kicad_projects/ferret/control.kicad_sch"), "3v3ldo", "")
 
         lines = sch.draw()
-        with open("test_schematic.svg", "w", encoding="utf-8") as f:
-            f.write("\n".join([l for l in lines if l is not None]))
+        with open(tmp_path / "test_schematic.svg", "w", encoding="utf-8") as f:
+            f.writelines(f"{line}\n" for line in lines)
+
+        assert lines[0].startswith("<svg ")
+        assert lines[-1] == "</svg>"
+        tags = Counter(re.match(r"<(!--|/?\w+)", line)[1] for line in lines)
+        assert tags == {
+            "polyline": 379,
+            "text": 181,
+            "!--": 84,
+            "rect": 51,
+            "circle": 43,
+            "svg": 1,
+            "/svg": 1,
+        }
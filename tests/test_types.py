@@ -1,7 +1,23 @@
+from typing import Literal, Union
+
+import pytest
+from pydantic.dataclasses import dataclass
+
+from edea.types.base import TAG_MAP, KicadExpr
+from edea.types.config import PydanticConfig
 from edea.types.parser import from_str
 from edea.types.schematic import Schematic
 
 
+@pytest.fixture
+def tag_map():
+    """restores TAG_MAP after a test, so classes defined in it don't leak into the parser"""
+    saved = {tag: list(classes) for tag, classes in TAG_MAP.items()}
+    yield TAG_MAP
+    TAG_MAP.clear()
+    TAG_MAP.update(saved)
+
+
 class TestTypes:
     def test_schematic(self):
         with open(
@@ -10,3 +26,31 @@ class TestTypes:
             sch = from_str(f.read())
 
         assert isinstance(sch, Schematic)
+
+    def test_mixed_union(self, tag_map):
+        @dataclass(config=PydanticConfig)
+        class UnionTestFree(KicadExpr):
+            name: str
+
+        @dataclass(config=PydanticConfig)
+        class UnionTestNamed(KicadExpr):
+            name: Literal["named"]
+
+        @dataclass(config=PydanticConfig)
+        class UnionTestHolder(KicadExpr):
+            item: Union[UnionTestFree, UnionTestNamed]
+            item_named_first: Union[UnionTestNamed, UnionTestFree]
+
+        assert UnionTestHolder in tag_map["union_test_holder"]
+
+        # union members are tried in order, a member whose first field isn't a
+        # Literal or an Enum must not be skipped in favour of a later one
+        holder = UnionTestHolder.from_list(
+            [["item", "named"], ["item_named_first", "named"]]
+        )
+        assert isinstance(holder.item, UnionTestFree)
+        assert isinstance(holder.item_named_first, UnionTestNamed)
+
+        holder = UnionTestHolder.from_list([["item", "other"], ["item_named_first", "other"]])
+        assert isinstance(holder.item, UnionTestFree)
+        assert isinstance(holder.item_named_first, UnionTestFree)